@@ -0,0 +1,357 @@
+"""
+Load test of the REST endpoints.
+
+    python -m benchmarks.api [--users 2000] [--events 20000] [--requests 200]
+        [--concurrency 8] [--save-baseline baseline.json | --baseline baseline.json]
+
+Seeds a throwaway test database (see ``DATABASE_URL``) through the test
+factories and replays a mix of requests per scenario from several threads:
+event list with each filter, retrieve, attend and cancel of a single event
+under contention, sign-up and token issue. Reports throughput, latency
+percentiles and database queries per request.
+
+``--save-baseline`` stores the results, ``--baseline`` compares them with
+stored ones: the run fails if p95 latency of a scenario grows over the
+tolerance, if it needs more queries per request or if any request fails.
+Baselines are only comparable on the same machine and database backend.
+"""
+
+import argparse
+import json
+import queue
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable
+
+from benchmarks import utils
+
+PASSWORD = "benchmark-password-1"
+
+
+@dataclass
+class Scenario:
+    name: str
+    # returns method, path and body of the i-th request
+    request: Callable[[int], tuple[str, str, dict | None]]
+    statuses: tuple[int, ...] = (200,)
+    # user the i-th request is authenticated as, None for anonymous requests
+    user: Callable[[int], object] | None = None
+    # share of --requests, for scenarios bound by password hashing
+    share: float = 1.0
+
+
+@dataclass
+class Result:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> dict:
+        percentiles = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        return {
+            "requests": len(self.latencies),
+            "throughput": round(len(self.latencies) / self.elapsed, 1),
+            "p50_ms": round(percentiles[49] * 1000, 2),
+            "p95_ms": round(percentiles[94] * 1000, 2),
+            "p99_ms": round(percentiles[98] * 1000, 2),
+            "queries": max(self.queries),
+            "errors": len(self.errors),
+        }
+
+
+def seed(users, events, seed_value=0, batch_size=5000):
+    """
+    Users with a known password, events mostly in the past, each with some
+    attendees. Returns users and ids of the events
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection
+    from django.utils import timezone
+
+    from events import models as events_models
+    from tests import factories
+
+    rnd = random.Random(seed_value)
+    now = timezone.now()
+
+    # hashing once instead of per user keeps seeding fast
+    password = make_password(PASSWORD)
+    get_user_model().objects.bulk_create(
+        factories.UserFactory.build_batch(users, password=password),
+        batch_size=batch_size,
+    )
+    users = list(get_user_model().objects.order_by("pk"))
+
+    batch = []
+    for _ in range(events):
+        share = rnd.random()
+        duration = timedelta(hours=rnd.randint(1, 48))
+        if share < 0.8:  # past
+            start_time = now - timedelta(days=rnd.uniform(3, 3 * 365))
+        elif share < 0.85:  # ongoing
+            start_time = now - duration * rnd.random()
+        else:  # upcoming
+            start_time = now + timedelta(days=rnd.uniform(0.1, 180))
+        batch.append(
+            factories.EventFactory.build(
+                creator=rnd.choice(users),
+                capacity=rnd.choice((10, 50, 100, 500)),
+                start_time=start_time,
+                end_time=start_time + duration,
+            )
+        )
+    events_models.Event.objects.bulk_create(batch, batch_size=batch_size)
+    event_ids = list(events_models.Event.objects.values_list("pk", flat=True))
+
+    attendances = []
+    for event in batch:
+        attendees = rnd.sample(users, min(len(users), rnd.randint(0, event.capacity)))
+        attendances += [
+            events_models.Attendance(event_id=event.pk, user_id=user.pk)
+            for user in attendees
+        ]
+    events_models.Attendance.objects.bulk_create(attendances, batch_size=batch_size)
+    events_models.Event.objects.recount_attendees()
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return users, event_ids
+
+
+def scenarios(
+    users, event_ids, requests, seed_value=0
+) -> tuple[list[Scenario], object]:
+    from django.utils import timezone
+
+    from tests import factories
+
+    rnd = random.Random(seed_value)
+    reader = rnd.choice(users)
+    starts_after = (timezone.now() - timedelta(days=30)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    # every attend request competes for the same row, half of them end up
+    # on the waitlist, cancels then move the waitlist up
+    hot_event = factories.EventFactory.create(
+        creator=reader,
+        capacity=max(1, requests // 2),
+        start_time=timezone.now() + timedelta(days=1),
+        end_time=timezone.now() + timedelta(days=1, hours=2),
+    )
+    contenders = [user for user in users if user.pk != reader.pk]
+
+    def listing(query=""):
+        # unique parameter bypasses the response cache
+        return lambda i: ("GET", f"/v1/events/?{query}&bench={i}", None)
+
+    def post(event_id, action):
+        return lambda i: ("POST", f"/v1/events/{event_id}/{action}/", None)
+
+    return [
+        Scenario("list", listing()),
+        Scenario("list (cached)", lambda i: ("GET", "/v1/events/", None)),
+        Scenario("list status=upcoming", listing("status=upcoming")),
+        Scenario("list status=ongoing", listing("status=ongoing")),
+        Scenario("list status=past", listing("status=past")),
+        Scenario("list attending", listing("attending=true")),
+        Scenario("list created", listing("created=true")),
+        Scenario("list starts_after", listing(f"starts_after={starts_after}")),
+        Scenario("list cursor", listing("cursor=")),
+        Scenario(
+            "retrieve",
+            lambda i: ("GET", f"/v1/events/{event_ids[i % len(event_ids)]}/", None),
+        ),
+        Scenario(
+            "attend",
+            post(hot_event.pk, "attend"),
+            statuses=(202, 204),
+            user=lambda i: contenders[i % len(contenders)],
+        ),
+        Scenario(
+            "cancel",
+            post(hot_event.pk, "cancel"),
+            statuses=(204,),
+            user=lambda i: contenders[i % len(contenders)],
+        ),
+        Scenario(
+            "signup",
+            lambda i: (
+                "POST",
+                "/v1/profile/signup/",
+                {
+                    "username": f"benchmark{i}",
+                    "email": f"benchmark{i}@test.com",
+                    "password": PASSWORD,
+                },
+            ),
+            statuses=(201,),
+            user=lambda i: None,
+            share=0.25,
+        ),
+        Scenario(
+            "token",
+            lambda i: (
+                "POST",
+                "/v1/profile/token/",
+                {"username": users[i % len(users)].username, "password": PASSWORD},
+            ),
+            user=lambda i: None,
+            share=0.25,
+        ),
+    ], reader
+
+
+def run(scenario, reader, requests, concurrency) -> Result:
+    from django.db import connection, connections
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    result = Result(scenario.name)
+    lock = threading.Lock()
+    tokens = {}
+    indexes = queue.SimpleQueue()
+    for index in range(max(2, int(requests * scenario.share))):
+        indexes.put(index)
+
+    def authorization(user):
+        if user is None:
+            return {}
+        if user.pk not in tokens:
+            tokens[user.pk] = str(AccessToken.for_user(user))
+        return {"HTTP_AUTHORIZATION": f"Bearer {tokens[user.pk]}"}
+
+    def worker():
+        client = APIClient()
+        try:
+            while True:
+                try:
+                    index = indexes.get_nowait()
+                except queue.Empty:
+                    return
+                user = scenario.user(index) if scenario.user else reader
+                method, path, data = scenario.request(index)
+                headers = authorization(user)
+
+                with CaptureQueriesContext(connection) as context:
+                    start = time.perf_counter()
+                    response = client.generic(
+                        method,
+                        path,
+                        json.dumps(data) if data is not None else "",
+                        content_type="application/json",
+                        **headers,
+                    )
+                    latency = time.perf_counter() - start
+
+                with lock:
+                    result.latencies.append(latency)
+                    result.queries.append(len(context.captured_queries))
+                    if response.status_code not in scenario.statuses:
+                        result.errors.append(f"{method} {path}: {response.status_code}")
+        finally:
+            # every thread has its own connection to the test database
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def report(summaries: dict):
+    columns = ("requests", "throughput", "p50_ms", "p95_ms", "p99_ms", "queries")
+    print(f"{'scenario':<22}" + "".join(f"{column:>12}" for column in columns))
+    for name, summary in summaries.items():
+        print(f"{name:<22}" + "".join(f"{summary[column]:>12}" for column in columns))
+
+
+def regressions(summaries: dict, baseline: dict, tolerance: float) -> list[str]:
+    problems = []
+    for name, summary in summaries.items():
+        if summary["errors"]:
+            problems.append(f"{name}: {summary['errors']} unexpected response(s)")
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        if summary["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            problems.append(
+                f"{name}: p95 {summary['p95_ms']} ms, baseline {expected['p95_ms']} ms"
+            )
+        if summary["queries"] > expected["queries"]:
+            problems.append(
+                f"{name}: {summary['queries']} queries per request, "
+                f"baseline {expected['queries']}"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", nargs="*", help="names of scenarios to run")
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed p95 growth"
+    )
+    args = parser.parse_args()
+
+    utils.setup_django()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment(debug=False)
+    with tempfile.TemporaryDirectory() as directory:
+        # threads can't share an in-memory SQLite database
+        name = (
+            f"{directory}/benchmark.sqlite3" if connection.vendor == "sqlite" else None
+        )
+        with utils.test_database(name):
+            users, event_ids = seed(args.users, args.events)
+            planned, reader = scenarios(users, event_ids, args.requests)
+            print(
+                f"#### {connection.vendor}, {args.users} users, {args.events} events, "
+                f"concurrency {args.concurrency}\n"
+            )
+
+            summaries = {}
+            for scenario in planned:
+                if args.only and scenario.name not in args.only:
+                    continue
+                result = run(scenario, reader, args.requests, args.concurrency)
+                summaries[scenario.name] = result.summary()
+                for error in result.errors[:3]:
+                    print(f"   {scenario.name}: {error}", file=sys.stderr)
+            report(summaries)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(summaries, indent=2) + "\n")
+    if args.baseline:
+        problems = regressions(
+            summaries, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Query plans and timings of the event list ``status`` filters.
+
+    python -m benchmarks.status_plans --rows 1000000 [--compare]
+
+Runs against a throwaway test database of the configured backend (see
+``DATABASE_URL``) seeded mostly with historical events, like production is.
+``--compare`` repeats the measurements with the indexes of migration 0003.
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks import utils
+
+
+def seed(rows, batch_size=10000):
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.utils import timezone
+
+    from events import models as events_models
+
+    creator = get_user_model().objects.create(username="benchmark")
+    now = timezone.now()
+    rnd = random.Random(0)
+
+    def event(index):
+        share = rnd.random()
+        duration = timedelta(hours=rnd.randint(1, 48))
+        if share < 0.98:  # past
+            start_time = now - timedelta(days=rnd.uniform(3, 5 * 365))
+        elif share < 0.99:  # ongoing
+            start_time = now - duration * rnd.random()
+        else:  # upcoming
+            start_time = now + timedelta(days=rnd.uniform(0.1, 90))
+        return events_models.Event(
+            creator=creator,
+            title=f"Event {index}",
+            description="benchmark",
+            capacity=100,
+            start_time=start_time,
+            end_time=start_time + duration,
+        )
+
+    for offset in range(0, rows, batch_size):
+        events_models.Event.objects.bulk_create(
+            [event(index) for index in range(offset, min(rows, offset + batch_size))]
+        )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def count_sql(queryset):
+    """
+    Same ``COUNT(*)`` query as limit/offset pagination runs
+    """
+    from django.db import connection
+
+    compiler = queryset.query.get_compiler(connection=connection)
+    where, params = compiler.compile(queryset.query.where)
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    return f"SELECT COUNT(*) FROM {table} WHERE {where}", params
+
+
+def run(sql, params, repeat):
+    from django.db import connection
+
+    best = float("inf")
+    with connection.cursor() as cursor:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            best = min(best, time.perf_counter() - started)
+    return rows, best
+
+
+def explain(sql, params):
+    from django.db import connection
+
+    prefix = connection.ops.explain_query_prefix()
+    rows, _ = run(f"{prefix} {sql}", params, 1)
+    return "\n".join(f"   {row[-1]}" for row in rows)
+
+
+def report(repeat):
+    from django.db import connection
+
+    from events import filters as events_filters
+    from events import models as events_models
+
+    filterset = events_filters.EventsListFilter(
+        queryset=events_models.Event.objects.all()
+    )
+    for status, _ in events_filters.EVENT_STATUS_CHOICES:
+        queryset = filterset.filter_by_status(
+            events_models.Event.objects.all(), "status", status
+        )
+        page = queryset.order_by("start_time", "id")[:20]
+        queries = {
+            "count": count_sql(queryset),
+            "first page": page.query.get_compiler(connection=connection).as_sql(),
+        }
+
+        print(f"== status={status}")
+        for name, (sql, params) in queries.items():
+            rows, elapsed = run(sql, params, repeat)
+            print(
+                f"-- {name}: {len(rows)} row(s), best of {repeat}: {elapsed * 1000:.2f} ms"
+            )
+            print(explain(sql, params))
+        print()
+
+
+def use_old_indexes():
+    from django.db import connection, models
+
+    from events import models as events_models
+
+    with connection.schema_editor() as editor:
+        for index in events_models.Event._meta.indexes:
+            if index.name in (
+                "event_start_time_id_idx",
+                "event_end_time_start_time_idx",
+            ):
+                editor.remove_index(events_models.Event, index)
+        editor.add_index(
+            events_models.Event,
+            models.Index(
+                fields=["start_time", "end_time"], name="event_start_t_849dac_idx"
+            ),
+        )
+        editor.execute("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args()
+
+    utils.setup_django()
+    with utils.test_database() as connection:
+        seed(args.rows)
+        print(f"#### {connection.vendor}, {args.rows} events, status indexes\n")
+        report(args.repeat)
+        if args.compare:
+            use_old_indexes()
+            print(f"#### {connection.vendor}, {args.rows} events, indexes of 0003\n")
+            report(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
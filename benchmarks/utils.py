@@ -0,0 +1,27 @@
+import contextlib
+import os
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tiko.settings")
+    import django
+
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database(name=None):
+    """
+    Throwaway database of the configured backend. ``name`` overrides the test
+    database name, e.g. to get a file instead of an in-memory SQLite database
+    which can't be written from several threads
+    """
+    from django.db import connection
+
+    if name is not None:
+        connection.settings_dict["TEST"]["NAME"] = name
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
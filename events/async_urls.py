@@ -0,0 +1,19 @@
+from django.urls import path
+
+from events import async_views
+
+
+urlpatterns = [
+    path("events/", async_views.event_list, name="async-event-list"),
+    path("events/<uuid:pk>/", async_views.event_detail, name="async-event-detail"),
+    path("events/<uuid:pk>/attend/", async_views.attend, name="async-event-attend"),
+    path("events/<uuid:pk>/cancel/", async_views.cancel, name="async-event-cancel"),
+    path(
+        "events/<uuid:pk>/stream/", async_views.event_stream, name="async-event-stream"
+    ),
+    path(
+        "events/<uuid:pk>/stream/ticket/",
+        async_views.stream_ticket,
+        name="async-event-stream-ticket",
+    ),
+]
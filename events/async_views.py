@@ -0,0 +1,352 @@
+"""
+Native async versions of the hottest ``EventViewSet`` actions. Meant to be
+served through ``tiko.asgi``, where a single process keeps many slow clients
+on one event loop instead of a thread per request.
+"""
+
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions, serializers
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from events import broadcast as events_broadcast
+from events import cache as events_cache
+from events import filters as events_filters
+from events import models as events_models
+from events import pagination as events_pagination
+from events import serializers as events_serializers
+from profiles import authentication
+from tiko import broker
+
+
+def authenticated(view):
+    """
+    Wraps request into DRF ``Request`` authenticated with ``CachedJWTAuthentication``,
+    which needs no database access on cache hits
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authenticator = authentication.CachedJWTAuthentication()
+        try:
+            credentials = authenticator.authenticate(request)
+        except exceptions.AuthenticationFailed as error:
+            return unauthorized(authenticator, request, error.detail)
+        if credentials is None:
+            return unauthorized(
+                authenticator, request, exceptions.NotAuthenticated.default_detail
+            )
+
+        request = Request(request, authenticators=())
+        request.user, request.auth = credentials
+        return await view(request, *args, **kwargs)
+
+    return csrf_exempt(wrapper)
+
+
+def authenticated_by_ticket(view):
+    """
+    ``authenticated``, or by ``ticket`` query parameter issued by ``stream_ticket``
+    for clients which can't send headers
+    """
+    by_token = authenticated(view)
+
+    @functools.wraps(view)
+    async def wrapper(request, pk):
+        ticket = request.GET.get("ticket")
+        if ticket is None:
+            return await by_token(request, pk)
+        if events_broadcast.check_ticket(ticket, pk) is None:
+            return unauthorized(
+                authentication.CachedJWTAuthentication(),
+                request,
+                "Ticket is invalid or expired",
+            )
+        return await view(request, pk)
+
+    return wrapper
+
+
+def asgi_only(view):
+    """
+    Long-lived responses would hold a WSGI worker thread while sending nothing,
+    async streams are only iterated by ASGI servers
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return json_response(
+                {"detail": "Only served by the ASGI interface."}, status=501
+            )
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def json_response(data, status=200, headers=None):
+    # rendered like responses of the sync views
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(
+        renderer.render(data),
+        status=status,
+        content_type=renderer.media_type,
+        headers=headers,
+    )
+
+
+def unauthorized(authenticator, request, detail):
+    if not isinstance(detail, dict):
+        detail = {"detail": detail}
+    return json_response(
+        detail,
+        status=401,
+        headers={"WWW-Authenticate": authenticator.authenticate_header(request)},
+    )
+
+
+def not_found():
+    return json_response({"detail": exceptions.NotFound.default_detail}, status=404)
+
+
+def read_queryset(request):
+    return (
+        events_models.Event.objects.all()
+        .with_attendance(request.user)
+        .order_by("start_time")
+    )
+
+
+@require_GET
+@authenticated
+async def event_list(request):
+    if not events_cache.enabled():
+        return await uncached_list(request)
+
+    key = await events_cache.aresponse_key(request)
+    etag = events_cache.get_etag(key)
+    if etag in request.headers.get("If-None-Match", ""):
+        return HttpResponseNotModified(headers={"ETag": etag})
+
+    data = await events_cache.aget_response(key)
+    if data is None:
+        data = await list_data(request)
+        if isinstance(data, HttpResponse):
+            return data
+        await events_cache.aset_response(key, data)
+
+    return json_response(data, headers={"ETag": etag})
+
+
+async def uncached_list(request):
+    """
+    Same as ``EventViewSet.uncached_list``
+    """
+    filterset = events_filters.EventsListFilter(
+        request.query_params,
+        queryset=events_models.Event.objects.all(),
+        request=request,
+    )
+    if not filterset.is_valid():
+        return json_response(filterset.errors, status=400)
+    etag = await events_cache.alist_etag(request, filterset.qs)
+    if events_cache.is_fresh(request, {"ETag": etag}):
+        return HttpResponseNotModified(headers={"ETag": etag})
+
+    data = await list_data(request)
+    if isinstance(data, HttpResponse):
+        return data
+    return json_response(data, headers={"ETag": etag})
+
+
+async def list_data(request) -> dict | HttpResponse:
+    """
+    Page of the event list, or an error response
+    """
+    params = events_serializers.EventFieldsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return json_response(params.errors, status=400)
+    params = params.validated_data
+    filterset = events_filters.EventsListFilter(
+        request.query_params, queryset=read_queryset(request), request=request
+    )
+    if not filterset.is_valid():
+        return json_response(filterset.errors, status=400)
+
+    paginator = events_pagination.EventPagination(params.get("fields"))
+    try:
+        page = await paginator.apaginate_queryset(filterset.qs, request)
+    except exceptions.NotFound as error:
+        return json_response({"detail": error.detail}, status=404)
+    if "attendees" in params.get("expand", ()):
+        await sync_to_async(events_serializers.EventRowSerializer.add_attendees)(
+            page, request
+        )
+
+    serializer = events_serializers.EventRowSerializer(page, many=True, **params)
+    return paginator.get_paginated_response(serializer.data).data
+
+
+@require_GET
+@authenticated
+async def event_detail(request, pk):
+    params = events_serializers.EventFieldsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return json_response(params.errors, status=400)
+    params = params.validated_data
+    try:
+        row = await events_serializers.EventRowSerializer.rows(
+            read_queryset(request), params.get("fields")
+        ).aget(pk=pk)
+    except events_models.Event.DoesNotExist:
+        return not_found()
+    headers = events_cache.detail_headers(request, row["updated_at"])
+    if events_cache.is_fresh(request, headers):
+        return HttpResponseNotModified(headers=headers)
+
+    if "attendees" in params.get("expand", ()):
+        await sync_to_async(events_serializers.EventRowSerializer.add_attendees)(
+            [row], request
+        )
+
+    serializer = events_serializers.EventRowSerializer(row, **params)
+    return json_response(serializer.data, headers=headers)
+
+
+@require_POST
+@authenticated
+async def attend(request, pk):
+    """
+    Same as ``EventViewSet.attend``. Repeated requests of already registered
+    users are answered without leaving the event loop
+    """
+    try:
+        instance = await events_models.Event.objects.aget(pk=pk)
+    except events_models.Event.DoesNotExist:
+        return not_found()
+
+    attendance = events_models.Event.attendees.through.objects.filter(
+        event_id=instance.pk, user_id=request.user.pk
+    )
+    if instance.is_upcoming() and await attendance.aexists():
+        return HttpResponse(status=204)
+
+    serializer = events_serializers.EventSerializer(
+        instance, context={"request": request}
+    )
+    try:
+        # seat reservation needs a transaction, which async ORM doesn't support yet
+        position = await sync_to_async(serializer.attend)(instance)
+    except serializers.ValidationError as error:
+        return json_response(error.detail, status=400)
+    except exceptions.NotFound as error:
+        return json_response({"detail": error.detail}, status=404)
+
+    if position is not None:
+        waitlist = events_serializers.WaitlistPositionSerializer(
+            {"waitlist_position": position}
+        )
+        return json_response(waitlist.data, status=202)
+    return HttpResponse(status=204)
+
+
+@require_POST
+@authenticated
+async def cancel(request, pk):
+    """
+    Same as ``EventViewSet.cancel``
+    """
+    try:
+        instance = await events_models.Event.objects.aget(pk=pk)
+    except events_models.Event.DoesNotExist:
+        return not_found()
+
+    serializer = events_serializers.EventSerializer(
+        instance, context={"request": request}
+    )
+    try:
+        await sync_to_async(serializer.cancel)(instance)
+    except serializers.ValidationError as error:
+        return json_response(error.detail, status=400)
+
+    return HttpResponse(status=204)
+
+
+@require_POST
+@authenticated
+async def stream_ticket(request, pk):
+    """
+    Ticket to ``event_stream`` of the event, passed as ``ticket`` query parameter
+    by clients like browsers' ``EventSource``
+    """
+    if not await events_models.Event.objects.filter(pk=pk).aexists():
+        return not_found()
+    return json_response(
+        {
+            "ticket": events_broadcast.issue_ticket(pk, request.user.pk),
+            "expires_in": settings.EVENTS_STREAM_TICKET_MAX_AGE,
+        },
+        status=201,
+    )
+
+
+@require_GET
+@asgi_only
+@authenticated_by_ticket
+async def event_stream(request, pk):
+    """
+    Server-Sent Events stream of attendance of the event, pushed as transactions
+    changing it commit: an ``attendance`` event with the current snapshot first,
+    then on every change, ``deleted`` once the event is deleted. Every
+    ``EVENTS_STREAM_RESYNC`` seconds without a push the snapshot is re-read,
+    which catches changes published to other workers. Served under ASGI only
+    """
+    snapshot = await events_broadcast.aget_snapshot(pk)
+    if snapshot is None:
+        return not_found()
+
+    subscription = broker.get_broker().subscribe(events_broadcast.channel(pk))
+    return StreamingHttpResponse(
+        stream_snapshots(pk, snapshot, subscription),
+        content_type="text/event-stream",
+        # X-Accel-Buffering keeps proxies like nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def stream_snapshots(pk, snapshot, subscription):
+    try:
+        yield server_sent_event(snapshot)
+        while True:
+            try:
+                pushed = await asyncio.wait_for(
+                    subscription.get(), timeout=settings.EVENTS_STREAM_RESYNC
+                )
+            except TimeoutError:
+                pushed = await events_broadcast.aget_snapshot(pk)
+                if pushed == snapshot:
+                    # keeps the connection open through idle timeouts
+                    yield b": keep-alive\n\n"
+                    continue
+
+            if pushed is None:
+                yield b"event: deleted\ndata: {}\n\n"
+                return
+            if pushed != snapshot:
+                snapshot = pushed
+                yield server_sent_event(snapshot)
+    finally:
+        subscription.close()
+
+
+def server_sent_event(snapshot: dict) -> bytes:
+    data = api_settings.DEFAULT_RENDERER_CLASSES[0]().render(snapshot)
+    return b"event: attendance\ndata: %s\n\n" % data
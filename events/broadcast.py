@@ -0,0 +1,100 @@
+"""
+Attendance of events pushed to subscribed clients, see ``async_views.event_stream``.
+
+Once a transaction changing attendee count, capacity or times of an event
+commits, a snapshot of the event is published to its channel. Snapshots are
+only read for events someone is subscribed to.
+
+Browsers' ``EventSource`` can't send the ``Authorization`` header, so streams
+also accept short-lived tickets of a single event, see ``issue_ticket``.
+"""
+
+import functools
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+from events import models as events_models
+from tiko import broker
+
+COLUMNS = ("id", "capacity", "attendee_count", "start_time", "end_time", "updated_at")
+TICKET_SALT = "events.broadcast.ticket"
+
+
+def channel(event_id) -> str:
+    return f"events:{event_id}"
+
+
+def snapshot(row: dict, now) -> dict:
+    if row["start_time"] >= now:
+        status = "upcoming"
+    elif row["end_time"] <= now:
+        status = "past"
+    else:
+        status = "ongoing"
+    return {
+        "id": str(row["id"]),
+        "capacity": row["capacity"],
+        "attendee_count": row["attendee_count"],
+        "remaining_capacity": row["capacity"] - row["attendee_count"],
+        "status": status,
+        "updated_at": row["updated_at"],
+    }
+
+
+async def aget_snapshot(event_id) -> dict | None:
+    """
+    Current snapshot of the event, None once it's deleted
+    """
+    row = (
+        await events_models.Event.objects.filter(pk=event_id).values(*COLUMNS).afirst()
+    )
+    return None if row is None else snapshot(row, timezone.now())
+
+
+def publish(event_ids):
+    """
+    Publishes snapshots of the events, None for deleted ones
+    """
+    event_broker = broker.get_broker()
+    event_ids = {
+        str(pk) for pk in event_ids if event_broker.has_subscribers(channel(pk))
+    }
+    if not event_ids:
+        return
+
+    now = timezone.now()
+    for row in events_models.Event.objects.filter(pk__in=event_ids).values(*COLUMNS):
+        event_ids.discard(str(row["id"]))
+        event_broker.publish(channel(row["id"]), snapshot(row, now))
+    for pk in event_ids:
+        event_broker.publish(channel(pk), None)
+
+
+def publish_on_commit(event_ids):
+    transaction.on_commit(functools.partial(publish, list(event_ids)), robust=True)
+
+
+def issue_ticket(event_id, user_id) -> str:
+    """
+    Signed ticket to the stream of the event, valid for
+    ``EVENTS_STREAM_TICKET_MAX_AGE`` seconds
+    """
+    return signing.dumps({"event": str(event_id), "user": user_id}, salt=TICKET_SALT)
+
+
+def check_ticket(ticket: str, event_id) -> int | None:
+    """
+    User id of a valid ticket to the stream of the event, None otherwise
+    """
+    try:
+        data = signing.loads(
+            ticket, salt=TICKET_SALT, max_age=settings.EVENTS_STREAM_TICKET_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    if data["event"] != str(event_id):
+        return None
+    return data["user"]
@@ -0,0 +1,160 @@
+"""
+Cached event list responses and validators of event responses.
+
+List responses are cached under a version which every change of events or
+attendance bumps, their ``ETag`` is derived from the key. Without a cache shared
+by all processes changes wouldn't reach other workers, so nothing is cached
+unless ``EVENTS_RESPONSE_CACHE`` is on. Lists are then validated by the latest
+change of the listed events instead, see ``list_etag``.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+
+VERSION_KEY = "events:version"
+# filters relative to the current time, responses to them expire with time too
+TIME_RELATIVE_PARAMS = ("status",)
+# validator of uncached lists, see list_etag
+LATEST = {"updated_at": Max("updated_at"), "count": Count("pk")}
+
+
+def enabled() -> bool:
+    return settings.EVENTS_RESPONSE_CACHE
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # start from a fresh value, so an evicted counter can't revive old entries
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate():
+    """
+    Makes all cached event responses stale. Version is bumped right away, so
+    the writer doesn't read its own stale responses within the transaction, and
+    once again on commit, dropping responses concurrent readers cached meanwhile
+    """
+    bump_version()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump_version)
+
+
+def response_key(request) -> str:
+    """
+    Cache key of a response for given request. Responses carry ``is_attending``
+    flag, so they are cached per user
+    """
+    return (
+        f"events:response:{get_version()}{time_bucket(request)}:"
+        f"{request_fingerprint(request)}"
+    )
+
+
+async def aresponse_key(request) -> str:
+    return (
+        f"events:response:{await aget_version()}{time_bucket(request)}:"
+        f"{request_fingerprint(request)}"
+    )
+
+
+def time_bucket(request) -> str:
+    """
+    Current ``EVENTS_RESPONSE_TIME_BUCKET`` for requests with time-relative
+    filters, events move between statuses without being changed
+    """
+    if not any(name in request.query_params for name in TIME_RELATIVE_PARAMS):
+        return ""
+    return f"@{int(time.time() // settings.EVENTS_RESPONSE_TIME_BUCKET)}"
+
+
+def request_fingerprint(request) -> str:
+    query = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    return hashlib.sha256(
+        repr((request.get_host(), request.path, query, request.user.pk)).encode()
+    ).hexdigest()
+
+
+def get_etag(key: str) -> str:
+    return '"%s"' % hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def list_etag(request, queryset) -> str:
+    """
+    ``ETag`` of an uncached list response: the filtered events as of their latest
+    change and their number. Changes of events and their attendance move
+    ``Event.updated_at``, deleted events change the number
+    """
+    return latest_etag(request, queryset.order_by().aggregate(**LATEST))
+
+
+async def alist_etag(request, queryset) -> str:
+    return latest_etag(request, await queryset.order_by().aaggregate(**LATEST))
+
+
+def latest_etag(request, latest: dict) -> str:
+    return get_etag(
+        f"{request_fingerprint(request)}{time_bucket(request)}:"
+        f"{latest['updated_at']}:{latest['count']}"
+    )
+
+
+def detail_headers(request, updated_at) -> dict:
+    """
+    ``ETag`` of an event detail response. Attendance changes move
+    ``Event.updated_at`` too, and with it ``is_attending``. No ``Last-Modified``:
+    its one second resolution would validate changes within the same second
+    """
+    return {
+        "ETag": get_etag(f"{request_fingerprint(request)}:{updated_at.isoformat()}"),
+    }
+
+
+def is_fresh(request, headers: dict) -> bool:
+    """
+    Whether the client's copy matches, i.e. 304 can be sent instead
+    """
+    return get_conditional_response(request, etag=headers["ETag"]) is not None
+
+
+def get_response(key: str):
+    return cache.get(key)
+
+
+def set_response(key: str, data):
+    cache.set(key, data, timeout=settings.EVENTS_RESPONSE_CACHE_TIMEOUT)
+
+
+async def aget_response(key: str):
+    return await cache.aget(key)
+
+
+async def aset_response(key: str, data):
+    await cache.aset(key, data, timeout=settings.EVENTS_RESPONSE_CACHE_TIMEOUT)
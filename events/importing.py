@@ -0,0 +1,294 @@
+"""
+Batch import of events and registrations from partner systems, used by
+``manage.py import_events``.
+
+Records are checked a whole batch at a time: referenced users and events are
+fetched with one query per batch and rows are saved with ``bulk_create``,
+no serializer runs per row. Historical data is accepted, so unlike the API
+events may start in the past.
+"""
+
+import csv
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from events import broadcast as events_broadcast
+from events import cache as events_cache
+from events import models as events_models
+
+# ids of events imported without one are derived from their position in the file
+# and their content, so a batch imported twice after a crash doesn't create
+# duplicates while records of another file never get the same ids
+IMPORT_NAMESPACE = uuid.UUID("39310b3e-2a13-411e-87e2-121130cf4c0f")
+
+
+def read_records(path: str, file_format: str) -> Iterator[str | dict]:
+    """
+    Yields raw records: lines of NDJSON files, rows of CSV files as dicts
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield line
+
+
+def parse_record(raw: str | dict) -> dict:
+    if isinstance(raw, dict):
+        return raw
+    record = json.loads(raw)
+    if not isinstance(record, dict):
+        raise ValueError("Record has to be an object")
+    return record
+
+
+def parse_text(value, name: str) -> str:
+    if not isinstance(value, str):
+        raise ValueError(f"{name} has to be a string")
+    return value.strip()
+
+
+def parse_time(value) -> datetime:
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise ValueError(f"Invalid datetime {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Importer:
+    """
+    Imports one batch of records at a time, has to be called in a transaction
+    """
+
+    def import_batch(self, start: int, records: list) -> list[dict]:
+        """
+        Saves valid records, numbered from ``start`` within the file.
+        Returns the rejected ones with their errors
+        """
+        rows, rejected = [], []
+        for index, raw in enumerate(records, start):
+            try:
+                rows.append((index, self.parse(parse_record(raw))))
+            except (ValueError, TypeError, KeyError) as error:
+                rejected.append(self.reject(index, raw, str(error)))
+
+        rejected += self.save(rows)
+        return sorted(rejected, key=lambda entry: entry["record"])
+
+    def parse(self, record: dict) -> dict:
+        raise NotImplementedError
+
+    def save(self, rows: list[tuple[int, dict]]) -> list[dict]:
+        raise NotImplementedError
+
+    @staticmethod
+    def reject(index: int, record, error: str) -> dict:
+        return {"record": index, "data": record, "error": error}
+
+
+class EventImporter(Importer):
+    """
+    Fields: ``title``, ``description``, ``start_time``, ``end_time``,
+    ``creator`` (user id), optional ``id`` and ``capacity``. Records with ids of
+    existing events are rejected, records without one imported before (a batch
+    replayed after a crash) are skipped
+    """
+
+    max_capacity = 1000000
+
+    def parse(self, record):
+        title = parse_text(record["title"], "Title")
+        description = parse_text(record["description"], "Description")
+        if not title or not description:
+            raise ValueError("Title and description are required")
+        if len(title) > 255:
+            raise ValueError("Title is longer than 255 characters")
+
+        start_time = parse_time(record["start_time"])
+        end_time = parse_time(record["end_time"])
+        if start_time >= end_time:
+            raise ValueError("Start time must be less than end time")
+
+        capacity = record.get("capacity")
+        capacity = 1 if capacity in (None, "") else int(capacity)
+        if not 1 <= capacity <= self.max_capacity:
+            raise ValueError(f"Capacity must be between 1 and {self.max_capacity}")
+
+        return {
+            "id": uuid.UUID(str(record["id"])) if record.get("id") else None,
+            "title": title,
+            "description": description,
+            "start_time": start_time,
+            "end_time": end_time,
+            "capacity": capacity,
+            "creator_id": int(record["creator"]),
+        }
+
+    def save(self, rows):
+        creators = set(
+            get_user_model()
+            .objects.filter(pk__in={data["creator_id"] for _, data in rows})
+            .values_list("pk", flat=True)
+        )
+
+        derived = set()
+        for index, data in rows:
+            if data["id"] is None:
+                data["id"] = self.derive_id(index, data)
+                derived.add(data["id"])
+        existing = set(
+            events_models.Event.objects.filter(
+                pk__in=[data["id"] for _, data in rows]
+            ).values_list("pk", flat=True)
+        )
+
+        events, rejected = [], []
+        for index, data in rows:
+            if data["creator_id"] not in creators:
+                rejected.append(self.reject(index, data, "Creator does not exist"))
+            elif data["id"] in existing:
+                if data["id"] in derived:
+                    continue
+                rejected.append(self.reject(index, data, "Event already exists"))
+            else:
+                existing.add(data["id"])
+                events.append(events_models.Event(**data))
+
+        # conflicts with events created concurrently are still skipped
+        events_models.Event.objects.bulk_create(events, ignore_conflicts=True)
+        events_cache.invalidate()
+        return rejected
+
+    @staticmethod
+    def derive_id(index: int, data: dict) -> uuid.UUID:
+        content = json.dumps(data, sort_keys=True, default=str)
+        return uuid.uuid5(IMPORT_NAMESPACE, f"{index}:{content}")
+
+
+class AttendeeImporter(Importer):
+    """
+    Fields: ``event`` (event id), ``user`` (user id). Registrations exceeding
+    capacity of the event are rejected, already registered users are skipped
+    """
+
+    def parse(self, record):
+        return {
+            "event_id": uuid.UUID(str(record["event"])),
+            "user_id": int(record["user"]),
+        }
+
+    def save(self, rows):
+        event_ids = {data["event_id"] for _, data in rows}
+        user_ids = {data["user_id"] for _, data in rows}
+
+        # locked, so API registrations can't take the seats in the meantime
+        free_seats = {
+            pk: capacity - attendee_count
+            for pk, capacity, attendee_count in events_models.Event.objects.filter(
+                pk__in=event_ids
+            )
+            .select_for_update()
+            .values_list("pk", "capacity", "attendee_count")
+        }
+        users = set(
+            get_user_model()
+            .objects.filter(pk__in=user_ids)
+            .values_list("pk", flat=True)
+        )
+        registered = set(
+            events_models.Attendance.objects.filter(
+                event_id__in=event_ids, user_id__in=user_ids
+            ).values_list("event_id", "user_id")
+        )
+
+        attendances, rejected = [], []
+        for index, data in rows:
+            pair = (data["event_id"], data["user_id"])
+            if data["event_id"] not in free_seats:
+                rejected.append(self.reject(index, data, "Event does not exist"))
+            elif data["user_id"] not in users:
+                rejected.append(self.reject(index, data, "User does not exist"))
+            elif pair in registered:
+                continue
+            elif free_seats[data["event_id"]] <= 0:
+                rejected.append(self.reject(index, data, "Event is full"))
+            else:
+                free_seats[data["event_id"]] -= 1
+                registered.add(pair)
+                attendances.append(events_models.Attendance(**data))
+
+        events_models.Attendance.objects.bulk_create(attendances, ignore_conflicts=True)
+        # bulk_create doesn't send m2m_changed
+        event_ids = {attendance.event_id for attendance in attendances}
+        events_models.Event.objects.filter(pk__in=event_ids).recount_attendees()
+        events_broadcast.publish_on_commit(event_ids)
+        return rejected
+
+
+class Checkpoint:
+    """
+    Number of records of the file which are already processed, written after
+    each committed batch
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"records": 0, "rejected": 0}
+
+    def save(self, state: dict):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(temporary, self.path)
+
+
+def batched(records: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_file(
+    importer: Importer,
+    records: Iterable,
+    checkpoint: Checkpoint,
+    state: dict,
+    batch_size: int,
+) -> Iterator[tuple[dict, list[dict]]]:
+    """
+    Imports records after those counted in ``state``, one transaction per batch.
+    Yields updated state and rejected records of every batch
+    """
+    for batch in batched(records, batch_size):
+        with transaction.atomic():
+            rejected = importer.import_batch(state["records"], batch)
+
+        state = {
+            "records": state["records"] + len(batch),
+            "rejected": state["rejected"] + len(rejected),
+        }
+        checkpoint.save(state)
+        yield state, rejected
@@ -0,0 +1,83 @@
+import itertools
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events import importing
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports events or registrations from an NDJSON or CSV file in batches. "
+        "Progress is checkpointed after every batch, an interrupted import "
+        "continues from the last one when started again."
+    )
+
+    importers = {
+        "events": importing.EventImporter,
+        "attendees": importing.AttendeeImporter,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=self.importers)
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=("ndjson", "csv"),
+            help="File format, derived from the file extension by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--checkpoint", help="Progress file, <path>.checkpoint by default"
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and import the file from the beginning",
+        )
+        parser.add_argument(
+            "--rejects", help="NDJSON file to append rejected records to"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"File {path} does not exist")
+        file_format = options["format"] or (
+            "csv" if path.lower().endswith(".csv") else "ndjson"
+        )
+
+        checkpoint = importing.Checkpoint(options["checkpoint"] or f"{path}.checkpoint")
+        state = {"records": 0, "rejected": 0}
+        if not options["restart"]:
+            state = checkpoint.load()
+            if state["records"]:
+                self.stdout.write(f"Resuming after {state['records']} records")
+
+        records = itertools.islice(
+            importing.read_records(path, file_format), state["records"], None
+        )
+        importer = self.importers[options["kind"]]()
+
+        rejects = open(options["rejects"], "a") if options["rejects"] else None
+        try:
+            for state, rejected in importing.import_file(
+                importer, records, checkpoint, state, options["batch_size"]
+            ):
+                if rejects:
+                    for entry in rejected:
+                        rejects.write(json.dumps(entry, default=str) + "\n")
+                self.stdout.write(
+                    f"{state['records']} records processed, {state['rejected']} rejected"
+                )
+        finally:
+            if rejects:
+                rejects.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {state['records'] - state['rejected']} of "
+                f"{state['records']} records"
+            )
+        )
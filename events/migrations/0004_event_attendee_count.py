@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:43
+
+from django.db import migrations, models
+from django.db.models import functions
+
+
+def count_attendees(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    attendees = (
+        Event.attendees.through.objects.filter(event_id=models.OuterRef("pk"))
+        .order_by()
+        .values("event_id")
+        .annotate(count=models.Count("*"))
+        .values("count")
+    )
+    Event.objects.update(
+        attendee_count=functions.Coalesce(models.Subquery(attendees), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_event_start_t_849dac_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="attendee_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_attendees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0005_waitlistentry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["start_time", "id"],
+                include=("end_time",),
+                name="event_start_time_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["end_time", "start_time"], name="event_end_time_start_time_idx"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="event",
+            name="event_start_t_849dac_idx",
+        ),
+    ]
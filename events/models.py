@@ -3,8 +3,102 @@ import uuid
 from django.conf import settings
 from django.core import validators
 from django.db import models
+from django.db.models import functions
 from django.utils import timezone
 
+from events import cache as events_cache
+
+
+def count_attendees(through):
+    """
+    Subquery counting attendees of the outer event
+    """
+    return functions.Coalesce(
+        models.Subquery(
+            through.objects.filter(event_id=models.OuterRef("pk"))
+            .order_by()
+            .values("event_id")
+            .annotate(count=models.Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+class EventQuerySet(models.QuerySet):
+    def with_attendance(self, user):
+        """
+        Annotates ``remaining_capacity`` and ``is_attending`` flag for given user
+        """
+        return self.annotate(
+            remaining_capacity=models.ExpressionWrapper(
+                models.F("capacity") - models.F("attendee_count"),
+                output_field=models.IntegerField(),
+            ),
+            is_attending=models.Exists(
+                Event.attendees.through.objects.filter(
+                    event_id=models.OuterRef("pk"), user_id=user.pk
+                )
+            ),
+        )
+
+    def lock(self, event_id) -> "Event":
+        """
+        Locks the event row until the end of the transaction and returns its
+        capacity and attendee counter. Serializes registrations of the event
+        with promotions from its waitlist
+        """
+        return (
+            self.select_for_update().only("capacity", "attendee_count").get(pk=event_id)
+        )
+
+    def take_seat(self, event_id, user_id) -> bool:
+        """
+        Atomically increments attendee counter unless the event is full or other
+        users wait for a seat ahead of the user. Returns False when the user
+        didn't get a seat
+        """
+        own_entry = WaitlistEntry.objects.filter(
+            event_id=event_id, user_id=user_id, id__lt=models.OuterRef("id")
+        )
+        ahead = (
+            WaitlistEntry.objects.filter(event_id=event_id)
+            .exclude(user_id=user_id)
+            .filter(~models.Exists(own_entry))
+        )
+        return self.filter(~models.Exists(ahead)).take_seats(event_id, 1)
+
+    def take_seats(self, event_id, count: int) -> bool:
+        """
+        Atomically increments attendee counter by ``count`` unless there aren't
+        as many seats left
+        """
+        taken = self.filter(
+            pk=event_id, attendee_count__lte=models.F("capacity") - count
+        ).update(
+            attendee_count=models.F("attendee_count") + count,
+            updated_at=functions.Now(),
+        )
+        if taken:
+            events_cache.invalidate()
+        return bool(taken)
+
+    def release_seat(self, event_id):
+        self.filter(pk=event_id, attendee_count__gt=0).update(
+            attendee_count=models.F("attendee_count") - 1, updated_at=functions.Now()
+        )
+        events_cache.invalidate()
+
+    def recount_attendees(self):
+        """
+        Recalculates attendee counter from the attendees table
+        """
+        events_cache.invalidate()
+        return self.update(
+            attendee_count=count_attendees(Event.attendees.through),
+            updated_at=functions.Now(),
+        )
+
 
 class Event(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -37,17 +131,94 @@ class Event(models.Model):
     end_time = models.DateTimeField(null=False)
 
     attendees = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, blank=True, related_name="accepted_events"
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name="accepted_events",
+        through="Attendance",
     )
 
+    # denormalized number of attendees, see EventQuerySet.take_seats/release_seat
+    attendee_count = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    # also moved by attendance changes, drives conditional GET of event responses
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
 
     class Meta:
         db_table = "event"
         indexes = [
-            models.Index(fields=["start_time", "end_time"]),
+            # "upcoming" filter and (start_time, id) keyset pagination
+            models.Index(
+                fields=["start_time", "id"],
+                include=["end_time"],
+                name="event_start_time_id_idx",
+            ),
+            # "past" and "ongoing" filters. Not yet ended events are the tail of
+            # the index, so "ongoing" doesn't scan through the historical ones
+            models.Index(
+                fields=["end_time", "start_time"], name="event_end_time_start_time_idx"
+            ),
             models.Index(fields=["created_at"]),
         ]
 
     def is_upcoming(self):
         return timezone.now() < self.start_time
+
+
+class Attendance(models.Model):
+    """
+    Through model of ``Event.attendees``, kept in the table of the former
+    auto-created one
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="+")
+    # indexed by attendance_user_event_idx
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+
+    class Meta:
+        db_table = "event_attendees"
+        unique_together = [("event", "user")]
+        indexes = [
+            # events of a user, see EventsListFilter.filter_by_attending
+            models.Index(fields=["user", "event"], name="attendance_user_event_idx"),
+        ]
+
+
+class WaitlistEntry(models.Model):
+    """
+    Position of a user in the queue for a seat at a full event,
+    entries are served in ``id`` order
+    """
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="waitlist")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="waitlisted_events",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "event_waitlist"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "user"], name="event_waitlist_unique_user"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["event", "id"]),
+        ]
+
+    def position(self) -> int:
+        return WaitlistEntry.objects.filter(
+            event_id=self.event_id, id__lte=self.id
+        ).count()
@@ -0,0 +1,247 @@
+import uuid
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions, pagination, response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from events import serializers as events_serializers
+
+
+class EventKeysetPagination(pagination.BasePagination):
+    """
+    Keyset (seek) pagination over ``(start_time, id)``.
+
+    Instead of skipping ``offset`` rows, every page continues right after the
+    last row of the previous one, so deep pages cost the same as the first one.
+    No ``COUNT(*)`` is issued. Direction follows the ``sort`` query parameter
+    of ``EventsListFilter``.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_query_description = "The pagination cursor value."
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "limit"
+    max_page_size = 1000
+    ordering_query_param = "sort"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare(queryset, request)
+        return self.set_page(list(queryset[: self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare(queryset, request)
+        return self.set_page([event async for event in queryset[: self.page_size + 1]])
+
+    def prepare(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.descending = self.is_descending(request)
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor[2]
+        return self.seek(queryset, self.cursor)
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if self.reverse:
+            self.page.reverse()
+
+        if self.reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def seek(self, queryset, cursor):
+        """
+        Orders the queryset along the key and drops everything up to the cursor
+        """
+        descending = self.descending != self.reverse
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}start_time", f"{prefix}id")
+        if cursor is None:
+            return queryset
+
+        start_time, pk, _ = cursor
+        if descending:
+            return queryset.filter(start_time__lte=start_time).filter(
+                Q(start_time__lt=start_time) | Q(id__lt=pk)
+            )
+        return queryset.filter(start_time__gte=start_time).filter(
+            Q(start_time__gt=start_time) | Q(id__gt=pk)
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def is_descending(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, "")
+        return ordering.strip().startswith("-")
+
+    def decode_cursor(self, request):
+        """
+        Returns ``(start_time, id, reverse)`` tuple or None for the first page
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            start_time = parse_datetime(tokens["s"][0])
+            pk = uuid.UUID(tokens["i"][0])
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+
+        if start_time is None:
+            raise exceptions.NotFound(self.invalid_cursor_message)
+        return start_time, pk, reverse
+
+    def encode_cursor(self, instance, reverse):
+        if isinstance(instance, dict):
+            # row of a values() queryset
+            start_time, pk = instance["start_time"], instance["id"]
+        else:
+            start_time, pk = instance.start_time, instance.pk
+        tokens = {"s": start_time.isoformat(), "i": str(pk)}
+        if reverse:
+            tokens["r"] = "1"
+
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return response.Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.cursor_query_description,
+                "schema": {"type": "string"},
+            },
+        ]
+
+
+class EventPagination(pagination.LimitOffsetPagination):
+    """
+    Limit/offset pagination which switches to ``EventKeysetPagination`` once
+    ``cursor`` query parameter is present (an empty value requests the first page).
+
+    Pages are fetched as ``EventRowSerializer`` rows with columns of ``fields``
+    only, while ``COUNT(*)`` runs on the events alone, without joining their
+    creators.
+    """
+
+    keyset_class = EventKeysetPagination
+
+    def __init__(self, fields=None):
+        self.fields = fields
+
+    def rows(self, queryset):
+        return events_serializers.EventRowSerializer.rows(queryset, self.fields)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(self.rows(queryset), request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.count = self.get_count(queryset)
+        self.offset = self.get_offset(request)
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return list(self.rows(queryset)[self.offset : self.offset + self.limit])
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Same as ``paginate_queryset``, for async views
+        """
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(
+                self.rows(queryset), request, view
+            )
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [
+            row
+            async for row in self.rows(queryset)[self.offset : self.offset + self.limit]
+        ]
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(
+            view
+        ) + self.keyset_class().get_schema_operation_parameters(view)
+
+
+class AttendeePagination(pagination.CursorPagination):
+    """
+    Seek pagination over attendee ids, events may have up to a million attendees
+    """
+
+    ordering = "id"
+    page_size_query_param = "limit"
+    max_page_size = 1000
@@ -6,4 +6,4 @@ from events import models as event_models
 class IsEventOwner(BasePermission):
 
     def has_object_permission(self, request, view, obj: event_models.Event) -> bool:
-        return request.user == obj.creator
+        return request.user.pk == obj.creator_id
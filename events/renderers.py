@@ -0,0 +1,94 @@
+import csv
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, Sequence
+from uuid import UUID
+
+from rest_framework import renderers
+
+
+class Echo:
+    """
+    File-like object which returns written value instead of buffering it
+    """
+
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(renderers.BaseRenderer):
+    """
+    Renders rows of ``values_list`` querysets lazily, for ``StreamingHttpResponse``.
+    Regular ``render`` is only used for error responses
+    """
+
+    charset = "utf-8"
+    # rows joined into a single chunk of the response
+    rows_per_chunk = 1000
+
+    def stream(self, fields: Sequence[str], rows: Iterable[tuple]) -> Iterator[str]:
+        lines = self.header(fields)
+        for row in rows:
+            lines.append(self.line(fields, [self.to_text(value) for value in row]))
+            if len(lines) >= self.rows_per_chunk:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not isinstance(data, dict):
+            data = {"detail": data}
+
+        fields = list(data)
+        rows = [tuple(data.values())]
+        return "".join(self.stream(fields, rows)).encode(self.charset)
+
+    def header(self, fields: Sequence[str]) -> list[str]:
+        return []
+
+    def line(self, fields: Sequence[str], values: list) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def to_text(value):
+        # same representation as API responses have
+        if isinstance(value, datetime):
+            value = value.isoformat()
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+            return value
+        if isinstance(value, UUID):
+            return str(value)
+        return value
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    # cells starting with these are evaluated as formulas by spreadsheets
+    formula_prefixes = ("=", "+", "-", "@", "\t", "\r")
+
+    def __init__(self):
+        self.writer = csv.writer(Echo())
+
+    def header(self, fields):
+        return [self.writer.writerow(fields)]
+
+    def line(self, fields, values):
+        return self.writer.writerow([self.escape(value) for value in values])
+
+    def escape(self, value):
+        if isinstance(value, str) and value.startswith(self.formula_prefixes):
+            return "'" + value
+        return value
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def line(self, fields, values):
+        return json.dumps(dict(zip(fields, values)), default=str) + "\n"
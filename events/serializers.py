@@ -1,16 +1,53 @@
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+from django.urls import reverse
 from django.utils import timezone
 
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 
+from events import broadcast as events_broadcast
+from events import cache as events_cache
 from events import models as event_models
+from events import tasks as events_tasks
 from profiles import serializers as profile_serializers
+from tiko import metrics, queries
 
 
-class EventSerializer(serializers.ModelSerializer):
+class BulkEventSerializer(metrics.SerializationTimerMixin, serializers.ListSerializer):
+    """
+    Creates all validated events with a single ``bulk_create``
+    """
+
+    batch_size = 1000
+
+    def create(self, validated_data):
+        with transaction.atomic(savepoint=False):
+            events = event_models.Event.objects.bulk_create(
+                [self.child.build_instance(attrs) for attrs in validated_data],
+                batch_size=self.batch_size,
+            )
+            # bulk_create doesn't send post_save
+            events_cache.invalidate()
+            events_tasks.send_events_changed.defer_many(
+                [{"event_id": str(event.pk)} for event in events]
+            )
+        return events
+
+
+class EventSerializer(metrics.SerializationTimerMixin, serializers.ModelSerializer):
+    """
+    Write representation of an event, attendees are available through
+    ``/events/{id}/attendees/``
+    """
+
     creator = profile_serializers.UserSerializer(read_only=True)
-    attendees = profile_serializers.UserSerializer(many=True, read_only=True)
+
+    # queries over the budget of the view, see query_budget of EventViewSet:
+    # putting user on the waitlist and moving users from it into seats
+    waitlist_queries = 3
+    promotion_queries = 4
 
     class Meta:
         model = event_models.Event
@@ -20,10 +57,11 @@ class EventSerializer(serializers.ModelSerializer):
             "description",
             "start_time",
             "end_time",
+            "capacity",
             "creator",
-            "attendees",
         )
-        read_only_fields = ("id", "creator", "attendees")
+        read_only_fields = ("id", "creator")
+        list_serializer_class = BulkEventSerializer
 
     def validate_start_time(self, value):
         if value < timezone.now():
@@ -36,18 +74,28 @@ class EventSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, attrs):
-        if attrs["start_time"] >= attrs["end_time"]:
+        start_time = attrs.get("start_time", getattr(self.instance, "start_time", None))
+        end_time = attrs.get("end_time", getattr(self.instance, "end_time", None))
+        if start_time >= end_time:
             raise serializers.ValidationError(
                 {"start_time": "Start time must be less than end time."}
             )
         return attrs
 
     def create(self, validated_data):
+        instance = self.build_instance(validated_data)
+        with transaction.atomic(savepoint=False):
+            instance.save()
+            events_tasks.send_events_changed.defer(event_id=str(instance.pk))
+        return instance
+
+    def build_instance(self, validated_data) -> event_models.Event:
         return event_models.Event(
             title=validated_data["title"],
             description=validated_data["description"],
             start_time=validated_data["start_time"],
             end_time=validated_data["end_time"],
+            capacity=validated_data.get("capacity", 1),
             creator=self.context["request"].user,
         )
 
@@ -62,41 +110,98 @@ class EventSerializer(serializers.ModelSerializer):
         else:
             self._full_update(instance, validated_data)
 
-        instance.save(update_fields=validated_data.keys())
+        with transaction.atomic():
+            if "capacity" in validated_data:
+                # locked, so registrations can't exceed the new capacity meanwhile
+                instance.attendee_count = event_models.Event.objects.lock(
+                    instance.pk
+                ).attendee_count
+                if instance.capacity < instance.attendee_count:
+                    raise serializers.ValidationError(
+                        {
+                            "capacity": "Capacity can't be lower than the number "
+                            f"of attendees ({instance.attendee_count})"
+                        }
+                    )
+            instance.save(update_fields=validated_data.keys())
+            if "capacity" in validated_data:
+                self._fill_from_waitlist(
+                    instance, seats=instance.capacity - instance.attendee_count
+                )
+            events_tasks.send_events_changed.defer(event_id=str(instance.pk))
         return instance
 
     def _partial_update(self, instance, validated_data):
-        instance.title = validated_data.get("title")
+        instance.title = validated_data.get("title", instance.title)
         instance.description = validated_data.get("description", instance.description)
         instance.start_time = validated_data.get("start_time", instance.start_time)
         instance.end_time = validated_data.get("end_time", instance.end_time)
+        instance.capacity = validated_data.get("capacity", instance.capacity)
 
     def _full_update(self, instance, validated_data):
         instance.title = validated_data["title"]
         instance.description = validated_data["description"]
         instance.start_time = validated_data["start_time"]
         instance.end_time = validated_data["end_time"]
+        instance.capacity = validated_data.get("capacity", instance.capacity)
 
-    def attend(self, instance: event_models.Event) -> event_models.Event:
-        user = self.context["request"].user
+    def attend(self, instance: event_models.Event, user=None) -> int | None:
+        """
+        Registers user (requesting one by default) for the event. If the event is
+        full, user is put on its waitlist instead and their position is returned
+        """
+        user = user or self.context["request"].user
 
         if not instance.is_upcoming():
             raise serializers.ValidationError(
                 "Can't attend started or finished event", code="read_only_event"
             )
 
-        with transaction.atomic():
-            if user not in instance.attendees.all():
-                if instance.attendees.count() == instance.capacity:
-                    raise serializers.ValidationError(
-                        "Event capacity is full", code="capacity_exhausted"
+        if self._attendance(instance, user).exists():
+            return None
+
+        try:
+            with transaction.atomic():
+                # a cancellation can't miss the user joining the waitlist meanwhile
+                event_models.Event.objects.lock(instance.pk)
+                if event_models.Event.objects.take_seat(instance.pk, user.pk):
+                    event_models.Event.attendees.through.objects.create(
+                        event_id=instance.pk, user_id=user.pk
                     )
-                self.instance.attendees.add(user)
-                instance.refresh_from_db()
-        return instance
+                    event_models.WaitlistEntry.objects.filter(
+                        event_id=instance.pk, user_id=user.pk
+                    ).delete()
+                    events_broadcast.publish_on_commit([instance.pk])
+                    events_tasks.send_attendance_changed.defer(
+                        event_id=str(instance.pk), user_id=user.pk
+                    )
+                    return None
+                self._allow_more(self.waitlist_queries)
+                entry, created = event_models.WaitlistEntry.objects.get_or_create(
+                    event_id=instance.pk, user_id=user.pk
+                )
+                if created:
+                    events_tasks.send_attendance_changed.defer(
+                        event_id=str(instance.pk), user_id=user.pk
+                    )
+        except IntegrityError:
+            # the seat taken above is rolled back
+            if self._attendance(instance, user).exists():
+                # concurrent request of the same user got registered first
+                return None
+            if not get_user_model().objects.filter(pk=user.pk).exists():
+                # deleted while their token is still valid, see TokenClaimsUser
+                raise exceptions.NotFound("User not found", code="user_not_found")
+            raise
+        metrics.record_error("capacity_exhausted")
+        return entry.position()
 
-    def cancel(self, instance: event_models.Event) -> event_models.Event:
-        user = self.context["request"].user
+    def cancel(self, instance: event_models.Event, user=None) -> event_models.Event:
+        """
+        Excludes user (requesting one by default) from attendees, freed seat goes
+        to the head of the waitlist. Waitlisted user is removed from the waitlist
+        """
+        user = user or self.context["request"].user
 
         if not instance.is_upcoming():
             raise serializers.ValidationError(
@@ -104,7 +209,298 @@ class EventSerializer(serializers.ModelSerializer):
             )
 
         with transaction.atomic():
-            if user in instance.attendees.all():
-                self.instance.attendees.remove(user)
-                instance.refresh_from_db()
+            event = event_models.Event.objects.lock(instance.pk)
+            deleted, _ = self._attendance(instance, user).delete()
+            if deleted:
+                event_models.Event.objects.release_seat(instance.pk)
+                self._fill_from_waitlist(
+                    instance, seats=event.capacity - max(event.attendee_count - 1, 0)
+                )
+                events_broadcast.publish_on_commit([instance.pk])
+            else:
+                deleted, _ = event_models.WaitlistEntry.objects.filter(
+                    event_id=instance.pk, user_id=user.pk
+                ).delete()
+            if deleted:
+                events_tasks.send_attendance_changed.defer(
+                    event_id=str(instance.pk), user_id=user.pk
+                )
         return instance
+
+    def fill_free_seats(self, instance: event_models.Event):
+        """
+        Moves users from the head of the waitlist into all free seats of the event
+        """
+        with transaction.atomic():
+            event = event_models.Event.objects.lock(instance.pk)
+            self._fill_from_waitlist(
+                instance, seats=event.capacity - event.attendee_count
+            )
+
+    def _fill_from_waitlist(self, instance: event_models.Event, seats: int):
+        """
+        Moves up to ``seats`` users from the head of the waitlist into free seats
+        at once. Has to be called inside a transaction holding the lock of the
+        event row, see EventQuerySet.lock
+        """
+        if seats <= 0:
+            return
+        attending = event_models.Attendance.objects.filter(
+            event_id=instance.pk, user_id=OuterRef("user_id")
+        )
+        waitlist = event_models.WaitlistEntry.objects.filter(event_id=instance.pk)
+        user_ids = list(
+            waitlist.filter(~Exists(attending))
+            .order_by("id")
+            .values_list("user_id", flat=True)[:seats]
+        )
+        if not user_ids or not event_models.Event.objects.take_seats(
+            instance.pk, len(user_ids)
+        ):
+            return
+
+        self._allow_more(self.promotion_queries)
+        event_models.Attendance.objects.bulk_create(
+            [
+                event_models.Attendance(event_id=instance.pk, user_id=user_id)
+                for user_id in user_ids
+            ]
+        )
+        # entries of users added to attendees directly go as well
+        waitlist.filter(Q(user_id__in=user_ids) | Exists(attending)).delete()
+        events_tasks.send_attendance_changed.defer_many(
+            [{"event_id": str(instance.pk), "user_id": user_id} for user_id in user_ids]
+        )
+
+    def _allow_more(self, count: int):
+        request = self.context.get("request")
+        if request is not None:
+            queries.allow_more(request, count)
+
+    @staticmethod
+    def _attendance(instance: event_models.Event, user):
+        return event_models.Event.attendees.through.objects.filter(
+            event_id=instance.pk, user_id=user.pk
+        )
+
+
+class EventListSerializer(EventSerializer):
+    """
+    Read representation of an event. Instead of embedding attendees it reports
+    attendance figures, annotated by ``EventQuerySet.with_attendance``.
+    Attendees are available through ``/events/{id}/attendees/``
+    """
+
+    attendee_count = serializers.IntegerField(read_only=True)
+    remaining_capacity = serializers.IntegerField(read_only=True)
+    is_attending = serializers.BooleanField(read_only=True)
+
+    class Meta(EventSerializer.Meta):
+        fields = (
+            "id",
+            "title",
+            "description",
+            "start_time",
+            "end_time",
+            "capacity",
+            "creator",
+            "attendee_count",
+            "remaining_capacity",
+            "is_attending",
+        )
+        read_only_fields = fields
+
+
+class EventRowSerializer(metrics.SerializationTimerMixin, serializers.BaseSerializer):
+    """
+    Same output as ``EventListSerializer``, built straight from ``values()`` rows
+    of ``rows()`` querysets with the creator joined in. No fields are bound and
+    no serializer is instantiated per event or creator.
+
+    ``fields`` limits the output (and fetched columns) to some of the fields,
+    ``expand`` adds related data, see ``EventFieldsSerializer``
+    """
+
+    # fields and the columns they are built from
+    columns = {
+        "id": ("id",),
+        "title": ("title",),
+        "description": ("description",),
+        "start_time": ("start_time",),
+        "end_time": ("end_time",),
+        "capacity": ("capacity",),
+        "creator": ("creator_id", "creator__username", "creator__email"),
+        "attendee_count": ("attendee_count",),
+        "remaining_capacity": ("remaining_capacity",),
+        "is_attending": ("is_attending",),
+    }
+    # always fetched, the list is ordered and paginated by id and start_time,
+    # updated_at validates conditional requests
+    key_columns = ("id", "start_time", "updated_at")
+    expandable = ("attendees",)
+    # events may have up to a million attendees, the rest are paginated
+    # through /events/{id}/attendees/
+    expand_limit = 10
+
+    class Meta:
+        list_serializer_class = metrics.TimedListSerializer
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field_names = tuple(fields or self.columns)
+        self.expand = tuple(expand)
+        # looked up once, not per row
+        self.timezone = timezone.get_current_timezone()
+
+    @classmethod
+    def rows(cls, queryset, fields=None):
+        """
+        Rows of an event queryset annotated with ``with_attendance``. Columns
+        of other fields aren't selected, nor is the creator joined without need
+        """
+        columns = dict.fromkeys(cls.key_columns)
+        for name in fields or cls.columns:
+            columns.update(dict.fromkeys(cls.columns[name]))
+        return queryset.values(*columns)
+
+    @classmethod
+    def add_attendees(cls, rows: list[dict], request) -> list[dict]:
+        """
+        Adds first ``expand_limit`` attendees (by id) of every event of the rows,
+        fetched with one query, and the link to all of them
+        """
+        attendees = {row["id"]: [] for row in rows}
+        rank = Window(RowNumber(), partition_by="event_id", order_by="user_id")
+        for attendance in (
+            event_models.Attendance.objects.filter(event_id__in=attendees)
+            .annotate(rank=rank)
+            .filter(rank__lte=cls.expand_limit)
+            .order_by("user_id")
+            .values("event_id", "user_id", "user__username", "user__email")
+        ):
+            attendees[attendance["event_id"]].append(
+                {
+                    "id": attendance["user_id"],
+                    "username": attendance["user__username"],
+                    "email": attendance["user__email"],
+                }
+            )
+        base_url = request.build_absolute_uri(reverse("event-list"))
+        for row in rows:
+            row["attendees"] = attendees[row["id"]]
+            row["attendees_url"] = f"{base_url}{row['id']}/attendees/"
+        # optional work of the client, on top of the budget of the view
+        queries.allow_more(request, 1)
+        return rows
+
+    def to_representation(self, row):
+        if len(self.field_names) == len(self.columns) and not self.expand:
+            return self.full_representation(row)
+
+        tz = self.timezone
+        representation = {}
+        for name in self.field_names:
+            if name == "creator":
+                representation[name] = {
+                    "id": row["creator_id"],
+                    "username": row["creator__username"],
+                    "email": row["creator__email"],
+                }
+            elif name in ("start_time", "end_time"):
+                representation[name] = format_datetime(row[name], tz)
+            elif name == "id":
+                representation[name] = str(row[name])
+            else:
+                representation[name] = row[name]
+        for name in self.expand:
+            representation[name] = row[name]
+            representation[f"{name}_url"] = row[f"{name}_url"]
+        return representation
+
+    def full_representation(self, row):
+        tz = self.timezone
+        return {
+            "id": str(row["id"]),
+            "title": row["title"],
+            "description": row["description"],
+            "start_time": format_datetime(row["start_time"], tz),
+            "end_time": format_datetime(row["end_time"], tz),
+            "capacity": row["capacity"],
+            "creator": {
+                "id": row["creator_id"],
+                "username": row["creator__username"],
+                "email": row["creator__email"],
+            },
+            "attendee_count": row["attendee_count"],
+            "remaining_capacity": row["remaining_capacity"],
+            "is_attending": row["is_attending"],
+        }
+
+
+class EventFieldsSerializer(serializers.Serializer):
+    """
+    ``fields`` and ``expand`` query parameters of event list and detail,
+    comma separated names
+    """
+
+    fields = serializers.CharField(required=False)
+    expand = serializers.CharField(required=False)
+
+    def validate_fields(self, value):
+        return self.names(value, EventRowSerializer.columns)
+
+    def validate_expand(self, value):
+        return self.names(value, EventRowSerializer.expandable)
+
+    @staticmethod
+    def names(value, allowed) -> tuple:
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = names.difference(allowed)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown field(s): {', '.join(sorted(unknown))}. "
+                f"Allowed: {', '.join(allowed)}"
+            )
+        # in the order of the full representation
+        return tuple(name for name in allowed if name in names)
+
+
+def format_datetime(value, tz) -> str:
+    # as serializers.DateTimeField does with the default ISO 8601 format
+    value = value.astimezone(tz).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class WaitlistPositionSerializer(serializers.Serializer):
+    waitlist_position = serializers.IntegerField(min_value=1)
+
+
+class BulkEventsSerializer(serializers.Serializer):
+    events = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=1000
+    )
+
+
+class BulkUsersSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000
+    )
+
+
+class BulkResultSerializer(serializers.Serializer):
+    """
+    Outcome of a single item of a bulk request. ``status`` is one of
+    ``attending``, ``waitlisted``, ``cancelled``, ``not_found`` or
+    an error code like ``read_only_event``
+    """
+
+    event = serializers.UUIDField(required=False)
+    user = serializers.IntegerField(required=False)
+    status = serializers.CharField()
+    waitlist_position = serializers.IntegerField(required=False)
+
+
+class EventIdSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from events import broadcast as events_broadcast
+from events import cache as events_cache
+from events import models as event_models
+from events import serializers as events_serializers
+
+
+@receiver(post_save, sender=event_models.Event)
+@receiver(post_delete, sender=event_models.Event)
+def invalidate_cached_responses(sender, **kwargs):
+    events_cache.invalidate()
+
+
+@receiver(post_save, sender=event_models.Event)
+@receiver(post_delete, sender=event_models.Event)
+def broadcast_event(sender, instance, **kwargs):
+    events_broadcast.publish_on_commit([instance.pk])
+
+
+@receiver(m2m_changed, sender=event_models.Event.attendees.through)
+def sync_attendee_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps ``Event.attendee_count`` in step when attendees are changed through the
+    related managers (admin, shell, tests). API endpoints maintain the counter
+    themselves and don't go through ``m2m_changed``.
+    """
+    if reverse and action == "pre_clear":
+        # ids of affected events are gone after the clear
+        instance._cleared_event_ids = list(
+            sender.objects.filter(user_id=instance.pk).values_list(
+                "event_id", flat=True
+            )
+        )
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        event_ids = [instance.pk]
+    elif action == "post_clear":
+        event_ids = instance.__dict__.pop("_cleared_event_ids", [])
+    else:
+        event_ids = pk_set
+
+    event_models.Event.objects.filter(pk__in=event_ids).recount_attendees()
+    events_broadcast.publish_on_commit(event_ids)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def remember_attended_events(sender, instance, **kwargs):
+    # attendances are gone by post_delete, deleted along with the user
+    instance._attended_event_ids = list(
+        event_models.Attendance.objects.filter(user_id=instance.pk).values_list(
+            "event_id", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def release_seats_of_deleted_user(sender, instance, **kwargs):
+    """
+    Corrects attendee counters of events the deleted user attended and gives
+    their seats to the waitlists
+    """
+    event_ids = instance.__dict__.pop("_attended_event_ids", [])
+    if not event_ids:
+        return
+
+    events = event_models.Event.objects.filter(pk__in=event_ids)
+    events.recount_attendees()
+    serializer = events_serializers.EventSerializer()
+    for event in events.filter(start_time__gt=timezone.now()):
+        serializer.fill_free_seats(event)
+    events_broadcast.publish_on_commit(event_ids)
@@ -0,0 +1,33 @@
+"""
+Side effects of registrations and event changes, deferred by ``EventSerializer``
+to task workers so they stay out of the request. Integrations (notifications,
+calendar invites, search indexing, ...) connect receivers to the signals below,
+which are sent by the worker. Tasks are coalesced, so receivers look up the
+current state (is the user attending, waitlisted, neither?) instead of being
+told what happened.
+"""
+
+from django.dispatch import Signal
+
+from events import models as events_models
+from tasks import queue
+
+# event_id, user_id
+attendance_changed = Signal()
+# event_ids
+events_changed = Signal()
+
+
+@queue.task(max_attempts=5)
+def send_attendance_changed(event_id, user_id):
+    attendance_changed.send(
+        sender=events_models.Event, event_id=event_id, user_id=user_id
+    )
+
+
+@queue.task(max_attempts=5, batch_size=500)
+def send_events_changed(batch: list[dict]):
+    events_changed.send(
+        sender=events_models.Event,
+        event_ids=[kwargs["event_id"] for kwargs in batch],
+    )
@@ -1,33 +1,210 @@
-from drf_spectacular.utils import extend_schema
-from rest_framework import decorators, pagination, permissions, response, viewsets
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (
+    OpenApiParameter,
+    extend_schema,
+    extend_schema_view,
+)
+from rest_framework import (
+    decorators,
+    exceptions,
+    pagination,
+    permissions,
+    response,
+    serializers,
+    viewsets,
+)
 
+from events import cache as events_cache
 from events import filters as events_filters
 from events import models as events_models
+from events import pagination as events_pagination
 from events import permissions as events_permissions
+from events import renderers as events_renderers
 from events import serializers as events_serializers
+from profiles import serializers as profile_serializers
+from tiko import metrics, queries
 
 
+FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        str,
+        description="Comma separated fields to return, all by default: "
+        + ", ".join(events_serializers.EventRowSerializer.columns),
+    ),
+    OpenApiParameter(
+        "expand",
+        str,
+        description="Comma separated related data to add: "
+        + ", ".join(events_serializers.EventRowSerializer.expandable),
+    ),
+]
+
+
+# rows are rendered by EventRowSerializer, documented by the equivalent
+# EventListSerializer
+@extend_schema_view(
+    list=extend_schema(
+        responses=events_serializers.EventListSerializer,
+        parameters=FIELDS_PARAMETERS,
+    ),
+    retrieve=extend_schema(
+        responses=events_serializers.EventListSerializer,
+        parameters=FIELDS_PARAMETERS,
+    ),
+)
 class EventViewSet(viewsets.ModelViewSet):
     permission_classes = (permissions.IsAuthenticated,)
     queryset = (
         events_models.Event.objects.all()
         .select_related("creator")
-        .prefetch_related("attendees")
         .order_by(
             "start_time",
         )
     )
     serializer_class = events_serializers.EventSerializer
     filterset_class = events_filters.EventsListFilter
+    pagination_class = events_pagination.EventPagination
+    bulk_max_size = 1000
+    export_renderer_classes = (
+        events_renderers.CSVRenderer,
+        events_renderers.NDJSONRenderer,
+    )
+    export_chunk_size = 2000
+    # most queries per request on the common path, see tiko.queries; waitlisting
+    # and promotions from the waitlist are budgeted by EventSerializer on top.
+    # Bulk actions query per event
+    query_budget = {
+        "list": 2,
+        "retrieve": 1,
+        "create": 3,
+        "update": 7,
+        "partial_update": 7,
+        "destroy": 4,
+        "attend": 9,
+        "cancel": 8,
+        "attendees": 2,
+        "export": 0,
+        "export_attendees": 1,
+        "bulk_create": 3,
+        "bulk_attend": None,
+        "bulk_cancel": None,
+        "import_attendees": None,
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # EventPagination fetches the page as rows
+            return queryset.with_attendance(self.request.user)
+        if self.action == "retrieve":
+            return events_serializers.EventRowSerializer.rows(
+                queryset.with_attendance(self.request.user),
+                self.get_fields_params().get("fields"),
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve"):
+            return events_serializers.EventRowSerializer
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ("list", "retrieve"):
+            kwargs.update(self.get_fields_params())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_fields_params(self) -> dict:
+        """
+        Validated ``fields`` and ``expand`` query parameters of list and detail
+        """
+        if not hasattr(self, "_fields_params"):
+            params = events_serializers.EventFieldsSerializer(
+                data=self.request.query_params
+            )
+            params.is_valid(raise_exception=True)
+            self._fields_params = params.validated_data
+        return self._fields_params
+
+    def paginate_queryset(self, queryset):
+        if self.action != "list":
+            return super().paginate_queryset(queryset)
+
+        params = self.get_fields_params()
+        self.paginator.fields = params.get("fields")
+        page = super().paginate_queryset(queryset)
+        if "attendees" in params.get("expand", ()):
+            events_serializers.EventRowSerializer.add_attendees(page, self.request)
+        return page
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Event detail, ``fields`` and ``expand`` work as in the list. Clients can
+        revalidate with ``If-None-Match`` and get 304 until the event or its
+        attendance changes
+        """
+        row = self.get_object()
+        headers = events_cache.detail_headers(request, row["updated_at"])
+        if events_cache.is_fresh(request, headers):
+            return response.Response(status=304, headers=headers)
+
+        if "attendees" in self.get_fields_params().get("expand", ()):
+            events_serializers.EventRowSerializer.add_attendees([row], request)
+        return response.Response(self.get_serializer(row).data, headers=headers)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Responses are cached until any event or attendance changes. Clients can
+        revalidate with ``If-None-Match`` and get 304 while nothing has changed,
+        also when responses aren't cached
+        """
+        if not events_cache.enabled():
+            return self.uncached_list(request, *args, **kwargs)
+
+        key = events_cache.response_key(request)
+        etag = events_cache.get_etag(key)
+        if etag in request.headers.get("If-None-Match", ""):
+            return response.Response(status=304, headers={"ETag": etag})
+
+        data = events_cache.get_response(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            events_cache.set_response(key, data)
+        return response.Response(data, headers={"ETag": etag})
+
+    def uncached_list(self, request, *args, **kwargs):
+        """
+        List validated by the latest change of the listed events, see
+        ``events.cache.list_etag``
+        """
+        # the validator is one query over the budget of the cached list
+        queries.allow_more(request, 1)
+        etag = events_cache.list_etag(
+            request, self.filter_queryset(events_models.Event.objects.all())
+        )
+        if events_cache.is_fresh(request, {"ETag": etag}):
+            return response.Response(status=304, headers={"ETag": etag})
+
+        page = super().list(request, *args, **kwargs)
+        page["ETag"] = etag
+        return page
 
     def get_permissions(self):
         classes = self.permission_classes
-        if self.action == "update":
+        if self.action in (
+            "update",
+            "partial_update",
+            "destroy",
+            "import_attendees",
+            "export_attendees",
+        ):
             classes += (events_permissions.IsEventOwner,)
         return [permission() for permission in classes]
 
     @extend_schema(
-        responses={204: None},
+        responses={204: None, 202: events_serializers.WaitlistPositionSerializer},
     )
     @decorators.action(
         methods=[
@@ -39,12 +216,19 @@ class EventViewSet(viewsets.ModelViewSet):
     def attend(self, request, *args, **kwargs):
         """
         Adds user to attendance list. This is noop action - if user is in the list,
-        request is ignored
+        request is ignored. If the event is full, user is put on the waitlist and
+        their position is returned with 202 status; the first user in the waitlist
+        takes a seat once somebody cancels
         """
         instance = self.get_object()
         serializer = self.get_serializer(instance)
 
-        serializer.attend(instance)
+        position = serializer.attend(instance)
+        if position is not None:
+            waitlist = events_serializers.WaitlistPositionSerializer(
+                {"waitlist_position": position}
+            )
+            return response.Response(waitlist.data, status=202)
 
         return response.Response(status=204)
 
@@ -60,8 +244,8 @@ class EventViewSet(viewsets.ModelViewSet):
     )
     def cancel(self, request, *args, **kwargs):
         """
-        Excludes user from attendance list. This is noop action - if user not in the list,
-        request is ignored
+        Excludes user from attendance list or from the waitlist. This is noop action -
+        if user not in the list, request is ignored
         """
         instance = self.get_object()
         serializer = self.get_serializer(instance)
@@ -69,3 +253,225 @@ class EventViewSet(viewsets.ModelViewSet):
         serializer.cancel(instance)
 
         return response.Response(status=204)
+
+    @decorators.action(
+        methods=[
+            "GET",
+        ],
+        detail=True,
+        url_path="attendees",
+        serializer_class=profile_serializers.UserSerializer,
+        pagination_class=events_pagination.AttendeePagination,
+    )
+    def attendees(self, request, *args, **kwargs):
+        """
+        Lists users attending the event, ordered by user id
+        """
+        instance = self.get_object()
+        page = self.paginate_queryset(instance.attendees.all())
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        responses={
+            (200, renderer.media_type): OpenApiTypes.STR
+            for renderer in export_renderer_classes
+        },
+    )
+    @decorators.action(
+        methods=[
+            "GET",
+        ],
+        detail=False,
+        url_path="export",
+        renderer_classes=export_renderer_classes,
+    )
+    def export(self, request, *args, **kwargs):
+        """
+        Streams all events matching the list filters as CSV (`?format=csv`)
+        or NDJSON (`?format=ndjson`)
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return self._export(
+            queryset,
+            "id",
+            "title",
+            "description",
+            "start_time",
+            "end_time",
+            "capacity",
+            "attendee_count",
+            "creator_id",
+            "creator__username",
+        )
+
+    @extend_schema(
+        responses={
+            (200, renderer.media_type): OpenApiTypes.STR
+            for renderer in export_renderer_classes
+        },
+    )
+    @decorators.action(
+        methods=[
+            "GET",
+        ],
+        detail=True,
+        url_path="attendees/export",
+        renderer_classes=export_renderer_classes,
+    )
+    def export_attendees(self, request, *args, **kwargs):
+        """
+        Streams attendees of the event, ordered by user id, as CSV (`?format=csv`)
+        or NDJSON (`?format=ndjson`). Available to the event owner only
+        """
+        instance = self.get_object()
+        return self._export(
+            instance.attendees.order_by("pk"), "id", "username", "email"
+        )
+
+    def _export(self, queryset, *fields):
+        """
+        Memory use doesn't depend on the number of rows: they are fetched in chunks
+        (with a server-side cursor where supported) while the response is sent
+        """
+        rows = queryset.values_list(*fields).iterator(chunk_size=self.export_chunk_size)
+        renderer = self.request.accepted_renderer
+        headers = [field.replace("__", "_") for field in fields]
+        return StreamingHttpResponse(
+            renderer.stream(headers, rows),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+
+    @extend_schema(
+        request=events_serializers.EventSerializer(many=True),
+        responses={201: events_serializers.EventIdSerializer(many=True)},
+    )
+    @decorators.action(
+        methods=[
+            "POST",
+        ],
+        detail=False,
+        url_path="bulk",
+    )
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Creates events from a list of payloads with a single insert.
+        Either all events are created or, if any of them is invalid, none
+        """
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=self.bulk_max_size
+        )
+        serializer.is_valid(raise_exception=True)
+        events = serializer.save()
+
+        created = events_serializers.EventIdSerializer(events, many=True)
+        return response.Response(created.data, status=201)
+
+    @extend_schema(
+        request=events_serializers.BulkEventsSerializer,
+        responses=events_serializers.BulkResultSerializer(many=True),
+    )
+    @decorators.action(
+        methods=[
+            "POST",
+        ],
+        detail=False,
+        url_path="bulk-attend",
+    )
+    def bulk_attend(self, request, *args, **kwargs):
+        """
+        Adds user to attendance lists of all listed events, outcome is reported per event
+        """
+        return self._bulk_events(request, self.get_serializer().attend, "attending")
+
+    @extend_schema(
+        request=events_serializers.BulkEventsSerializer,
+        responses=events_serializers.BulkResultSerializer(many=True),
+    )
+    @decorators.action(
+        methods=[
+            "POST",
+        ],
+        detail=False,
+        url_path="bulk-cancel",
+    )
+    def bulk_cancel(self, request, *args, **kwargs):
+        """
+        Excludes user from attendance lists of all listed events, outcome is reported
+        per event
+        """
+        return self._bulk_events(request, self.get_serializer().cancel, "cancelled")
+
+    @extend_schema(
+        request=events_serializers.BulkUsersSerializer,
+        responses=events_serializers.BulkResultSerializer(many=True),
+    )
+    @decorators.action(
+        methods=[
+            "POST",
+        ],
+        detail=True,
+        url_path="attendees/import",
+    )
+    def import_attendees(self, request, *args, **kwargs):
+        """
+        Adds listed users to attendance list of the event, outcome is reported per user.
+        Available to the event owner only
+        """
+        instance = self.get_object()
+        payload = events_serializers.BulkUsersSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+
+        user_ids = payload.validated_data["users"]
+        users = get_user_model().objects.only("pk").in_bulk(user_ids)
+        serializer = self.get_serializer(instance)
+
+        results = [
+            {
+                "user": pk,
+                **self._bulk_outcome(
+                    serializer.attend, instance, users.get(pk), "attending"
+                ),
+            }
+            for pk in user_ids
+        ]
+        return response.Response(
+            events_serializers.BulkResultSerializer(results, many=True).data
+        )
+
+    def _bulk_events(self, request, method, status):
+        payload = events_serializers.BulkEventsSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+
+        event_ids = payload.validated_data["events"]
+        events = events_models.Event.objects.in_bulk(event_ids)
+
+        results = [
+            {
+                "event": pk,
+                **self._bulk_outcome(method, events.get(pk), request.user, status),
+            }
+            for pk in event_ids
+        ]
+        return response.Response(
+            events_serializers.BulkResultSerializer(results, many=True).data
+        )
+
+    @staticmethod
+    def _bulk_outcome(method, instance, user, status) -> dict:
+        if instance is None or user is None:
+            return {"status": "not_found"}
+
+        try:
+            result = method(instance, user)
+        except serializers.ValidationError as error:
+            code = error.get_codes()[0]
+            metrics.record_error(code)
+            return {"status": code}
+        except exceptions.NotFound:
+            return {"status": "not_found"}
+
+        if isinstance(result, int):
+            return {"status": "waitlisted", "waitlist_position": result}
+        return {"status": status}
@@ -0,0 +1,83 @@
+"""
+Gunicorn configuration, picked up automatically from the working directory.
+
+All values can be tuned with environment variables:
+    SERVER_INTERFACE    - "wsgi" (threaded workers) or "asgi" (uvicorn workers)
+    WEB_CONCURRENCY     - number of worker processes, 2 * CPUs + 1 by default
+    WEB_THREADS         - threads per WSGI worker
+    PORT                - port to listen on
+    PROMETHEUS_MULTIPROC_DIR - directory where workers share metrics, emptied on start
+
+Reloads: ``kill -HUP <master>`` gracefully replaces workers with the same
+(preloaded) code, ``kill -USR2 <master>`` starts a new master with fresh code
+next to the old one, which is then stopped with ``kill -QUIT <old master>``.
+"""
+
+import os
+import shutil
+import tempfile
+
+
+def cpu_count():
+    try:
+        # respects CPU affinity of the container
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# has to be set before the app (and prometheus_client) is loaded
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "tiko-metrics")
+)
+# values of a previous run would be summed with the new ones. Emptied here as
+# gauges of the preloaded app open their files before on_starting is called
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+
+interface = os.environ.get("SERVER_INTERFACE", "wsgi")
+
+if interface == "asgi":
+    wsgi_app = "tiko.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "tiko.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.environ.get("WEB_THREADS", 4))
+    # settings size the password hashing pool by it
+    os.environ["WEB_THREADS"] = str(threads)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", cpu_count() * 2 + 1))
+# settings turn off caching which needs a cache shared by the workers and
+# split the password hashing pool among them
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# load Django once in the master, workers share its memory copy-on-write
+preload_app = True
+
+keepalive = int(os.environ.get("WEB_KEEPALIVE", 5))
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+
+# recycle workers from time to time to keep memory fragmentation in check
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def post_fork(server, worker):
+    # nothing is supposed to be opened while preloading, but connections
+    # must never be shared between processes
+    from django.db import connections
+
+    connections.close_all()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
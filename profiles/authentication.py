@@ -0,0 +1,143 @@
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from tiko import metrics
+
+
+class ClaimsCache:
+    """
+    Bounded LRU cache of validated tokens keyed on token id (``jti``).
+    Entries live ``ttl`` seconds at most and never outlive the token itself.
+    The raw token is kept next to the entry, so a forged token reusing a known
+    ``jti`` doesn't skip signature verification
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_id, raw_token: bytes):
+        with self._lock:
+            entry = self._entries.get(token_id)
+            if entry is None:
+                return None
+
+            cached_raw_token, token, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token_id]
+                return None
+            self._entries.move_to_end(token_id)
+
+        if not hmac.compare_digest(cached_raw_token, raw_token):
+            return None
+        return token
+
+    def set(self, token_id, raw_token: bytes, token):
+        expires_at = min(time.time() + self.ttl, token["exp"])
+        with self._lock:
+            self._entries[token_id] = (raw_token, token, expires_at)
+            self._entries.move_to_end(token_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TokenClaimsUser(SimpleLazyObject):
+    """
+    User backed by token claims. ``id``/``pk`` come straight from the token,
+    the user row is loaded on first access to any other attribute
+    (or on comparison / ``isinstance`` checks, e.g. when passed to the ORM as is).
+    Requests which never load it don't notice the user was deleted or
+    deactivated until the token expires; writes referencing a deleted user fail
+    on the foreign key and are answered with 404
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        self.__dict__["_user_id"] = user_id
+        super().__init__(lambda: load_user(user_id))
+
+    def __bool__(self):
+        return True
+
+    @property
+    def pk(self):
+        return self._user_id
+
+    @property
+    def id(self):
+        return self._user_id
+
+
+def load_user(user_id):
+    UserModel = get_user_model()
+    try:
+        user = UserModel.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    except UserModel.DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication which validates every token once per ``TTL`` and doesn't
+    query the user table up front, see ``TokenClaimsUser``
+    """
+
+    cache = ClaimsCache(
+        max_size=settings.TOKEN_CLAIMS_CACHE["MAX_SIZE"],
+        ttl=settings.TOKEN_CLAIMS_CACHE["TTL"],
+    )
+
+    def authenticate(self, request):
+        with metrics.phase("authentication"):
+            return super().authenticate(request)
+
+    def get_validated_token(self, raw_token: bytes):
+        token_id = self.get_token_id(raw_token)
+        if token_id is None:
+            return super().get_validated_token(raw_token)
+
+        token = self.cache.get(token_id, raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            self.cache.set(token_id, raw_token, token)
+        return token
+
+    def get_token_id(self, raw_token: bytes):
+        """
+        Reads ``jti`` claim of a not yet verified token
+        """
+        try:
+            claims = jwt.decode(raw_token, options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return None
+        return claims.get(api_settings.JTI_CLAIM)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        return TokenClaimsUser(user_id)
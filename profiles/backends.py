@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from profiles import hashing
+
+UserModel = get_user_model()
+
+
+class HashingExecutorModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` which checks passwords on ``hashing.executor``
+    instead of the request-serving thread
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # hash anyway to keep timing of unknown and known usernames the same
+            hashing.make_password(password)
+            return None
+
+        if not hashing.check_password(password, user.password):
+            return None
+        if not self.user_can_authenticate(user):
+            return None
+
+        if hashing.must_update(user.password):
+            user.password = hashing.make_password(password)
+            user.save(update_fields=["password"])
+        return user
@@ -0,0 +1,113 @@
+import threading
+from concurrent import futures
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import exceptions
+
+from tiko import metrics
+
+
+class HashingQueueFull(exceptions.APIException):
+    status_code = 503
+    default_detail = "Too many password checks in progress, try again later."
+    default_code = "hashing_queue_full"
+
+
+class HashingExecutor:
+    """
+    Runs password hashing on a dedicated pool so bursts of sign-ups and logins
+    take at most ``workers`` cores of the process, see ``pool_size``. At most ``max_queue`` operations wait for a
+    worker, anything above that is rejected with ``HashingQueueFull``.
+
+    ``thread`` pool is enough for PBKDF2, hashlib releases the GIL while hashing;
+    ``process`` pool isolates hashers which don't; ``inline`` hashes in the caller.
+    In-flight operations and queue depth are exported as Prometheus gauges
+    """
+
+    def __init__(self, kind: str, workers: int, max_queue: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of operations waiting for a free worker
+        """
+        return max(self.in_flight - self.workers, 0)
+
+    def run(self, fn, *args):
+        if self.kind == "inline":
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingQueueFull()
+        with self._lock:
+            self.in_flight += 1
+            self.report()
+        try:
+            return self.get_executor().submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.report()
+            self._slots.release()
+
+    def report(self):
+        metrics.HASHING_IN_FLIGHT.set(self.in_flight)
+        metrics.HASHING_QUEUE_DEPTH.set(self.queue_depth)
+
+    def get_executor(self) -> futures.Executor:
+        # created lazily, so pre-forking servers start the pool in every worker
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = futures.ProcessPoolExecutor(
+                        max_workers=self.workers, initializer=django.setup
+                    )
+                else:
+                    self._executor = futures.ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="hashing"
+                    )
+            return self._executor
+
+
+def pool_size(config: dict) -> tuple[int, int]:
+    """
+    Workers and queue length of the pool of this process. ``WORKERS`` and
+    ``MAX_QUEUE`` are per host and split among ``PROCESSES`` server processes,
+    each running at least one worker. A process queues fewer operations than
+    it has request ``THREADS`` (0 for unbounded), so surplus ones are rejected
+    """
+    processes = max(config["PROCESSES"], 1)
+    workers = max(config["WORKERS"] // processes, 1)
+    max_queue = config["MAX_QUEUE"] // processes
+    if config["THREADS"]:
+        max_queue = min(max_queue, max(config["THREADS"] - workers - 1, 0))
+    return workers, max_queue
+
+
+executor = HashingExecutor(
+    settings.PASSWORD_HASHING["EXECUTOR"], *pool_size(settings.PASSWORD_HASHING)
+)
+
+
+def make_password(password: str) -> str:
+    return executor.run(hashers.make_password, password)
+
+
+def check_password(password: str, encoded: str) -> bool:
+    return executor.run(hashers.check_password, password, encoded)
+
+
+def must_update(encoded: str) -> bool:
+    try:
+        return hashers.identify_hasher(encoded).must_update(encoded)
+    except ValueError:
+        return False
@@ -0,0 +1,9 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    Documents ``CachedJWTAuthentication`` as the bearer JWT it is
+    """
+
+    target_class = "profiles.authentication.CachedJWTAuthentication"
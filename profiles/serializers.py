@@ -1,22 +1,27 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from profiles import hashing
+from tiko import metrics
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(metrics.SerializationTimerMixin, serializers.ModelSerializer):
 
     def create(self, validated_data):
         UserModel = get_user_model()
 
-        user = UserModel.objects.create_user(
-            username=validated_data["username"],
-            password=validated_data["password"],
-            email=validated_data["email"],
+        # same as create_user, but the password is hashed on hashing executor
+        user = UserModel(
+            username=UserModel.normalize_username(validated_data["username"]),
+            email=UserModel.objects.normalize_email(validated_data["email"]),
+            password=hashing.make_password(validated_data["password"]),
         )
+        user.save()
 
         return user
 
     class Meta:
         model = get_user_model()
         fields = ("id", "username", "password", "email")
-        write_only_fields = ("password",)
         read_only_fields = ("id",)
+        extra_kwargs = {"password": {"write_only": True}}
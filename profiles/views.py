@@ -9,3 +9,4 @@ class CreateUserView(CreateAPIView):
     model = get_user_model()
     permission_classes = (permissions.AllowAny,)
     serializer_class = profile_serializers.UserSerializer
+    query_budget = 2
@@ -1,3 +1,23 @@
 #!/bin/sh
-python manage.py migrate
-python manage.py runserver 0.0.0.0:8000
+# Usage: entrypoint.sh [serve|migrate|worker|dev]
+set -e
+
+case "${1:-serve}" in
+  serve)
+    # settings are read from ./gunicorn.conf.py
+    exec gunicorn
+    ;;
+  migrate)
+    exec python manage.py migrate --noinput
+    ;;
+  worker)
+    exec python manage.py run_tasks
+    ;;
+  dev)
+    python manage.py migrate
+    exec python manage.py runserver 0.0.0.0:8000
+    ;;
+  *)
+    exec "$@"
+    ;;
+esac
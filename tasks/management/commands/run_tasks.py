@@ -0,0 +1,45 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks import worker as tasks_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background tasks until interrupted. SIGTERM and SIGINT "
+        "stop the worker once the running batch is finished."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.TASKS["CONCURRENCY"],
+            help="Tasks running at once",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TASKS["BATCH_SIZE"],
+            help="Tasks claimed from the queue at once",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no due tasks left",
+        )
+
+    def handle(self, *args, **options):
+        worker = tasks_worker.Worker(
+            concurrency=options["concurrency"],
+            batch_size=options["batch_size"],
+            lease=settings.TASKS["LEASE"],
+        )
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: worker.stop())
+
+        self.stdout.write(f"Running tasks with concurrency {options['concurrency']}")
+        worker.run(settings.TASKS["POLL_INTERVAL"], once=options["once"])
+        self.stdout.write(self.style.SUCCESS("Worker stopped"))
@@ -0,0 +1,108 @@
+"""
+Durable queue of background tasks kept in the database. Side effects which
+don't have to finish within the request (notifications, calendar invites,
+search indexing, ...) are deferred to ``manage.py run_tasks`` workers::
+
+    @queue.task(max_attempts=5)
+    def send_invite(event_id, user_id): ...
+
+    send_invite.defer(event_id=str(event.pk), user_id=user.pk)
+
+``defer`` writes the task within the current transaction (transactional
+outbox): it commits together with the changes it follows up on, so neither a
+rolled back request nor a crash right after the commit leaves them apart, and
+workers only see it once committed. A task pending with the same kwargs
+already is coalesced into it, which makes tasks read the current state rather
+than rely on their kwargs being the latest.
+Tasks with ``batch_size`` get a list of kwargs of up to that many tasks.
+"""
+
+import functools
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.db import transaction
+
+from tasks import models as tasks_models
+
+registry = {}
+
+
+@dataclass(frozen=True)
+class TaskFunction:
+    func: Callable
+    name: str
+    max_attempts: int = 3
+    # seconds before the first retry, doubled with every next one
+    retry_delay: float = 10
+    batch_size: int | None = None
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def defer(self, **kwargs):
+        """
+        Enqueues the task within the current transaction
+        """
+        self.defer_many([kwargs])
+
+    def defer_many(self, kwargs_list: list[dict]):
+        """
+        Enqueues a task for each kwargs with a single insert within the current
+        transaction, eager tasks run once it commits
+        """
+        if not kwargs_list:
+            return
+        if settings.TASKS["EAGER"]:
+            transaction.on_commit(
+                functools.partial(self.run, unique(kwargs_list)), robust=True
+            )
+            return
+        self.enqueue(kwargs_list)
+
+    def enqueue(self, kwargs_list: list[dict]):
+        tasks_models.Task.objects.bulk_create(
+            [
+                tasks_models.Task(name=self.name, kwargs=kwargs, key=self.key(kwargs))
+                for kwargs in unique(kwargs_list)
+            ],
+            # coalesced into the pending task with the same key
+            ignore_conflicts=True,
+        )
+
+    def key(self, kwargs: dict) -> str:
+        return hashlib.sha256(f"{self.name}:{encode(kwargs)}".encode()).hexdigest()
+
+    def run(self, kwargs_list: list[dict]):
+        if self.batch_size is None:
+            for kwargs in kwargs_list:
+                self.func(**kwargs)
+        else:
+            for start in range(0, len(kwargs_list), self.batch_size):
+                self.func(kwargs_list[start : start + self.batch_size])
+
+
+def task(name=None, **options):
+    """
+    Registers the function as a task, under ``module.function`` name by default
+    """
+
+    def register(func):
+        registered = TaskFunction(
+            func=func, name=name or f"{func.__module__}.{func.__name__}", **options
+        )
+        registry[registered.name] = registered
+        return registered
+
+    return register
+
+
+def encode(kwargs: dict) -> str:
+    return json.dumps(kwargs, sort_keys=True, separators=(",", ":"))
+
+
+def unique(kwargs_list: list[dict]) -> list[dict]:
+    return list({encode(kwargs): kwargs for kwargs in kwargs_list}.values())
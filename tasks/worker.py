@@ -0,0 +1,138 @@
+"""
+Worker running queued tasks, see ``manage.py run_tasks``.
+
+Due tasks are claimed in batches with a lease: rows are locked with
+``SKIP LOCKED`` where the database supports it, so workers don't block each
+other (SQLite serializes writers with ``BEGIN IMMEDIATE``). Claimed tasks of
+the same name run together, those with ``batch_size`` in a single call, on at
+most ``concurrency`` threads. Failed tasks are retried with exponential
+backoff until ``max_attempts`` is reached.
+"""
+
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from tasks import models as tasks_models
+from tasks import queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self, concurrency: int, batch_size: int, lease: float):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.lease = lease
+        self.stopped = threading.Event()
+
+    def run(self, poll_interval: float, once: bool = False):
+        """
+        Runs tasks until stopped, or until the queue is drained with ``once``
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while not self.stopped.is_set():
+                claimed = self.claim()
+                if claimed:
+                    self.run_batch(executor, claimed)
+                elif once:
+                    return
+                else:
+                    self.stopped.wait(poll_interval)
+
+    def stop(self):
+        self.stopped.set()
+
+    def claim(self) -> list[tasks_models.Task]:
+        now = timezone.now()
+        due = tasks_models.Task.objects.filter(
+            Q(status=tasks_models.Task.PENDING, run_at__lte=now)
+            | Q(status=tasks_models.Task.RUNNING, locked_until__lte=now)
+        )
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            tasks = list(due.order_by("run_at", "id")[: self.batch_size])
+            tasks_models.Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                status=tasks_models.Task.RUNNING,
+                locked_until=now + timedelta(seconds=self.lease),
+                attempts=F("attempts") + 1,
+            )
+        for task in tasks:
+            task.attempts += 1
+        return tasks
+
+    def run_batch(self, executor, tasks: list[tasks_models.Task]):
+        by_name = groupby(
+            sorted(tasks, key=lambda task: task.name), lambda task: task.name
+        )
+        futures = []
+        for name, group in by_name:
+            group = list(group)
+            task_function = queue.registry.get(name)
+            if task_function is None:
+                self.fail(group, f"Unknown task {name}")
+            elif task_function.batch_size is None:
+                futures += [
+                    executor.submit(self.execute, task_function, [task])
+                    for task in group
+                ]
+            else:
+                futures += [
+                    executor.submit(
+                        self.execute,
+                        task_function,
+                        group[start : start + task_function.batch_size],
+                    )
+                    for start in range(0, len(group), task_function.batch_size)
+                ]
+        for future in futures:
+            future.result()
+
+    def execute(
+        self, task_function: queue.TaskFunction, tasks: list[tasks_models.Task]
+    ):
+        close_old_connections()
+        try:
+            task_function.run([task.kwargs for task in tasks])
+        except Exception:
+            logger.exception("Task %s failed", task_function.name)
+            self.fail(tasks, traceback.format_exc(), task_function)
+        else:
+            tasks_models.Task.objects.filter(
+                pk__in=[task.pk for task in tasks]
+            ).delete()
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def fail(tasks: list[tasks_models.Task], error: str, task_function=None):
+        """
+        Schedules retries of the tasks, marks them failed after the last attempt
+        """
+        for task in tasks:
+            if task_function is None or task.attempts >= task_function.max_attempts:
+                tasks_models.Task.objects.filter(pk=task.pk).update(
+                    status=tasks_models.Task.FAILED, locked_until=None, last_error=error
+                )
+                continue
+
+            delay = task_function.retry_delay * 2 ** (task.attempts - 1)
+            try:
+                with transaction.atomic():
+                    tasks_models.Task.objects.filter(pk=task.pk).update(
+                        status=tasks_models.Task.PENDING,
+                        run_at=timezone.now() + timedelta(seconds=delay),
+                        locked_until=None,
+                        last_error=error,
+                    )
+            except IntegrityError:
+                # the same task got queued again meanwhile, retried as that one
+                tasks_models.Task.objects.filter(pk=task.pk).delete()
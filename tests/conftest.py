@@ -1,10 +1,21 @@
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 from tests.factories import UserFactory
 from tests.utils import authenticate
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def query_budget(settings):
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "ENABLED": True, "RAISE": True}
+
+
 @pytest.fixture()
 def api_client():
     return APIClient()
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from tests import factories
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def event():
+    return factories.EventFactory(
+        start_time=timezone.now() + timedelta(hours=2), capacity=1
+    )
+
+
+def test_list_matches_sync_api(authenticated_client, event):
+    response = authenticated_client.get("/v1/async/events/", {"limit": 5})
+    assert response.status_code == 200
+
+    expected = authenticated_client.get("/v1/events/", {"limit": 5}).json()
+    assert response.json()["count"] == expected["count"] == 1
+    assert response.json()["results"] == expected["results"]
+
+
+def test_list_keyset_and_not_modified(authenticated_client, event):
+    factories.EventFactory(start_time=timezone.now() + timedelta(hours=3))
+
+    response = authenticated_client.get("/v1/async/events/", {"cursor": "", "limit": 1})
+    assert response.status_code == 200
+    assert response.json()["next"]
+    assert len(response.json()["results"]) == 1
+
+    cached = authenticated_client.get(
+        "/v1/async/events/",
+        {"cursor": "", "limit": 1},
+        HTTP_IF_NONE_MATCH=response["ETag"],
+    )
+    assert cached.status_code == 304
+
+
+def test_invalid_filter(authenticated_client):
+    response = authenticated_client.get("/v1/async/events/", {"status": "unknown"})
+    assert response.status_code == 400
+    assert "status" in response.json()
+
+
+def test_requires_authentication(api_client, event):
+    response = api_client.get("/v1/async/events/")
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"].startswith("Bearer")
+
+    response = api_client.get(
+        "/v1/async/events/", HTTP_AUTHORIZATION="Bearer not-a-token"
+    )
+    assert response.status_code == 401
+
+
+def test_detail(authenticated_client, event):
+    response = authenticated_client.get(f"/v1/async/events/{event.pk}/")
+    assert response.status_code == 200
+    assert response.json()["id"] == str(event.pk)
+    assert response.json()["is_attending"] is False
+
+    missing = factories.EventFactory.build()
+    response = authenticated_client.get(f"/v1/async/events/{missing.pk}/")
+    assert response.status_code == 404
+
+
+def test_attend_and_cancel(authenticated_client, user, event):
+    response = authenticated_client.post(f"/v1/async/events/{event.pk}/attend/")
+    assert response.status_code == 204
+    assert event.attendees.filter(pk=user.pk).exists()
+
+    response = authenticated_client.post(f"/v1/async/events/{event.pk}/attend/")
+    assert response.status_code == 204
+
+    response = authenticated_client.post(f"/v1/async/events/{event.pk}/cancel/")
+    assert response.status_code == 204
+    assert not event.attendees.filter(pk=user.pk).exists()
+
+
+def test_attend_past_event(authenticated_client):
+    event = factories.EventFactory(start_time=timezone.now() - timedelta(hours=1))
+
+    response = authenticated_client.post(f"/v1/async/events/{event.pk}/attend/")
+    assert response.status_code == 400
+
+
+def test_attend_full_event_joins_waitlist(authenticated_client, event):
+    event.attendees.add(factories.UserFactory())
+
+    response = authenticated_client.post(f"/v1/async/events/{event.pk}/attend/")
+    assert response.status_code == 202
+    assert response.json() == {"waitlist_position": 1}
+
+
+def test_rejects_other_methods(authenticated_client, event):
+    response = authenticated_client.get(f"/v1/async/events/{event.pk}/attend/")
+    assert response.status_code == 405
@@ -0,0 +1,137 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from events import models as events_models
+
+from tests import factories
+from tests.utils import authenticate
+
+
+pytestmark = pytest.mark.django_db
+
+
+def event_payload(n):
+    return {
+        "title": f"event {n}",
+        "description": f"event {n} description",
+        "start_time": (timezone.now() + timedelta(hours=2)).isoformat(),
+        "end_time": (timezone.now() + timedelta(hours=3)).isoformat(),
+        "capacity": 10,
+    }
+
+
+class TestBulkCreate:
+    def test_create(self, authenticated_client, user):
+        response = authenticated_client.post(
+            "/v1/events/bulk/", [event_payload(n) for n in range(3)], format="json"
+        )
+        assert response.status_code == 201, response.data
+        assert len(response.json()) == 3
+
+        events = events_models.Event.objects.filter(
+            pk__in=[entry["id"] for entry in response.json()]
+        )
+        assert events.count() == 3
+        assert {event.creator_id for event in events} == {user.pk}
+        assert {event.capacity for event in events} == {10}
+
+    def test_all_or_nothing(self, authenticated_client):
+        invalid = event_payload(1)
+        invalid["end_time"] = (timezone.now() + timedelta(hours=1)).isoformat()
+
+        response = authenticated_client.post(
+            "/v1/events/bulk/", [event_payload(0), invalid], format="json"
+        )
+        assert response.status_code == 400
+        assert not events_models.Event.objects.exists()
+
+    def test_single_create_is_persisted(self, authenticated_client):
+        response = authenticated_client.post("/v1/events/", event_payload(0))
+        assert response.status_code == 201
+        assert events_models.Event.objects.filter(pk=response.json()["id"]).exists()
+
+
+class TestBulkAttendance:
+    def test_attend(self, authenticated_client, user):
+        start_time = timezone.now() + timedelta(hours=2)
+        event = factories.EventFactory(start_time=start_time)
+        full_event = factories.EventFactory(capacity=1, start_time=start_time)
+        full_event.attendees.add(factories.UserFactory())
+        past_event = factories.EventFactory(
+            start_time=timezone.now() - timedelta(hours=2),
+            end_time=timezone.now() - timedelta(hours=1),
+        )
+        missing = uuid.uuid4()
+
+        response = authenticated_client.post(
+            "/v1/events/bulk-attend/",
+            {
+                "events": [
+                    str(e) for e in (event.pk, full_event.pk, past_event.pk, missing)
+                ]
+            },
+            format="json",
+        )
+        assert response.status_code == 200
+        assert response.json() == [
+            {"event": str(event.pk), "status": "attending"},
+            {
+                "event": str(full_event.pk),
+                "status": "waitlisted",
+                "waitlist_position": 1,
+            },
+            {"event": str(past_event.pk), "status": "read_only_event"},
+            {"event": str(missing), "status": "not_found"},
+        ]
+        assert event.attendees.filter(pk=user.pk).exists()
+
+    def test_cancel(self, authenticated_client, user):
+        events = factories.EventFactory.create_batch(
+            2, start_time=timezone.now() + timedelta(hours=2)
+        )
+        for event in events:
+            event.attendees.add(user)
+
+        response = authenticated_client.post(
+            "/v1/events/bulk-cancel/",
+            {"events": [str(e.pk) for e in events]},
+            format="json",
+        )
+        assert response.status_code == 200
+        assert {entry["status"] for entry in response.json()} == {"cancelled"}
+        assert not user.accepted_events.exists()
+
+    def test_import_attendees(self, api_client, user):
+        authenticate(api_client, user)
+        event = factories.EventFactory(
+            creator=user, capacity=2, start_time=timezone.now() + timedelta(hours=2)
+        )
+        users = factories.UserFactory.create_batch(3)
+
+        response = api_client.post(
+            f"/v1/events/{event.pk}/attendees/import/",
+            {"users": [u.pk for u in users] + [0xFFFFFF]},
+            format="json",
+        )
+        assert response.status_code == 200
+        assert [entry["status"] for entry in response.json()] == [
+            "attending",
+            "attending",
+            "waitlisted",
+            "not_found",
+        ]
+        event.refresh_from_db()
+        assert event.attendee_count == 2
+
+    def test_import_attendees_owner_only(self, authenticated_client):
+        event = factories.EventFactory(start_time=timezone.now() + timedelta(hours=2))
+
+        response = authenticated_client.post(
+            f"/v1/events/{event.pk}/attendees/import/",
+            {"users": [factories.UserFactory().pk]},
+            format="json",
+        )
+        assert response.status_code == 403
@@ -0,0 +1,177 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django.utils.http import http_date
+
+from events import models as events_models
+from tests import factories
+from tests.utils import authenticate
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def event():
+    return factories.EventFactory(start_time=timezone.now() + timedelta(hours=2))
+
+
+def test_repeated_list_is_served_from_cache(
+    authenticated_client, event, django_assert_num_queries
+):
+    response = authenticated_client.get("/v1/events/", {"status": "upcoming"})
+    assert response.status_code == 200
+
+    with django_assert_num_queries(0):
+        cached = authenticated_client.get("/v1/events/", {"status": "upcoming"})
+    assert cached.json() == response.json()
+    assert cached["ETag"] == response["ETag"]
+
+
+def test_not_modified(authenticated_client, event, django_assert_num_queries):
+    etag = authenticated_client.get("/v1/events/")["ETag"]
+
+    with django_assert_num_queries(0):
+        response = authenticated_client.get("/v1/events/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not response.content
+
+
+def test_attendance_invalidates(authenticated_client, event):
+    response = authenticated_client.get("/v1/events/")
+    assert response.json()["results"][0]["attendee_count"] == 0
+
+    authenticated_client.post(f"/v1/events/{event.pk}/attend/")
+
+    updated = authenticated_client.get(
+        "/v1/events/", HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+    assert updated.status_code == 200
+    assert updated.json()["results"][0]["attendee_count"] == 1
+    assert updated.json()["results"][0]["is_attending"] is True
+
+
+def test_event_changes_invalidate(authenticated_client, event):
+    authenticated_client.get("/v1/events/")
+
+    factories.EventFactory()
+    assert authenticated_client.get("/v1/events/").json()["count"] == 2
+
+    event.delete()
+    assert authenticated_client.get("/v1/events/").json()["count"] == 1
+
+
+def test_cached_per_user(api_client, user, event):
+    event.attendees.add(user)
+    authenticate(api_client, user)
+    assert api_client.get("/v1/events/").json()["results"][0]["is_attending"]
+
+    authenticate(api_client, factories.UserFactory())
+    assert not api_client.get("/v1/events/").json()["results"][0]["is_attending"]
+
+
+@pytest.mark.parametrize("prefix", ["/v1/events/", "/v1/async/events/"])
+def test_time_relative_filters_expire(authenticated_client, event, prefix, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    response = authenticated_client.get(prefix, {"status": "upcoming"})
+    unfiltered = authenticated_client.get(prefix)
+    assert response.json()["count"] == 1
+
+    # starts without being changed through the API
+    events_models.Event.objects.filter(pk=event.pk).update(
+        start_time=timezone.now() - timedelta(minutes=1)
+    )
+    cached = authenticated_client.get(
+        prefix, {"status": "upcoming"}, HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+    assert cached.status_code == 304
+
+    monkeypatch.setattr(time, "time", lambda: now + 10)
+    expired = authenticated_client.get(
+        prefix, {"status": "upcoming"}, HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+    assert expired.status_code == 200
+    assert expired.json()["count"] == 0
+    assert authenticated_client.get(prefix)["ETag"] == unfiltered["ETag"]
+
+
+@pytest.mark.parametrize("prefix", ["/v1/events/", "/v1/async/events/"])
+def test_disabled(authenticated_client, event, prefix, settings):
+    settings.EVENTS_RESPONSE_CACHE = False
+    etag = authenticated_client.get(prefix)["ETag"]
+    response = authenticated_client.get(prefix, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    # not invalidated, validated by the change of the event
+    events_models.Event.objects.filter(pk=event.pk).update(
+        title="Changed", updated_at=timezone.now()
+    )
+    response = authenticated_client.get(prefix, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["results"][0]["title"] == "Changed"
+    assert response["ETag"] != etag
+
+    etag = response["ETag"]
+    event.delete()
+    response = authenticated_client.get(prefix, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["results"] == []
+
+
+@pytest.mark.parametrize("prefix", ["/v1/events/", "/v1/async/events/"])
+def test_detail_not_modified(authenticated_client, event, prefix):
+    url = f"{prefix}{event.pk}/"
+    response = authenticated_client.get(url)
+    assert not response.has_header("Last-Modified")
+
+    not_modified = authenticated_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert not_modified.status_code == 304
+    assert not not_modified.content
+    assert not_modified["ETag"] == response["ETag"]
+
+
+def test_detail_changes_within_a_second(authenticated_client, event):
+    url = f"/v1/events/{event.pk}/"
+    updated_at = event.updated_at.replace(microsecond=0)
+    events_models.Event.objects.filter(pk=event.pk).update(updated_at=updated_at)
+    etag = authenticated_client.get(url)["ETag"]
+
+    events_models.Event.objects.filter(pk=event.pk).update(
+        capacity=5, updated_at=updated_at.replace(microsecond=500000)
+    )
+    response = authenticated_client.get(
+        url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=http_date(time.time())
+    )
+
+    assert response.status_code == 200
+    assert response.json()["capacity"] == 5
+
+
+def test_detail_attendance_moves_updated_at(authenticated_client, event):
+    url = f"/v1/events/{event.pk}/"
+    etag = authenticated_client.get(url)["ETag"]
+
+    authenticated_client.post(f"/v1/events/{event.pk}/attend/")
+    response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["is_attending"] is True
+
+    etag = response["ETag"]
+    authenticated_client.post(f"/v1/events/{event.pk}/cancel/")
+    response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["attendee_count"] == 0
+
+
+def test_detail_validators_per_user_and_fields(api_client, user, event):
+    url = f"/v1/events/{event.pk}/"
+    authenticate(api_client, user)
+    etag = api_client.get(url)["ETag"]
+
+    response = api_client.get(url, {"fields": "id"}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    authenticate(api_client, factories.UserFactory())
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -1,6 +1,9 @@
+from base64 import b64encode
 from datetime import timedelta
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from events import models as events_models
@@ -131,6 +134,22 @@ class TestEventsList:
         assert response.json()["count"] == 1
         assert response.json()["results"][0]["id"] == str(event.pk)
 
+    def test_not_attending(self, api_client, user, sequential_events):
+        authenticate(api_client, user)
+        event = factories.EventFactory()
+        event.attendees.add(user, factories.UserFactory())
+        response = api_client.get("/v1/events/", {"attending": False})
+        assert response.status_code == 200
+        assert response.json()["count"] == len(sequential_events)
+        assert str(event.pk) not in {e["id"] for e in response.json()["results"]}
+
+    def test_attending_without_duplicates(self, api_client, user):
+        authenticate(api_client, user)
+        event = factories.EventFactory(creator=user)
+        event.attendees.add(user, factories.UserFactory(), factories.UserFactory())
+        response = api_client.get("/v1/events/", {"attending": True, "created": True})
+        assert response.json()["count"] == 1
+
     def test_only_created(self, api_client, user, sequential_events):
         authenticate(api_client, user)
         event = factories.EventFactory()
@@ -154,11 +173,155 @@ class TestEventsList:
         assert response.json()["results"][1]["id"] == str(sequential_events[2].pk)
 
 
+class TestEventsCursorPagination:
+    def test_walk_forward_and_back(self, authenticated_client, sequential_events):
+        event1, event2, event3, event4 = sequential_events
+
+        response = authenticated_client.get("/v1/events/", {"cursor": "", "limit": 3})
+        assert response.status_code == 200
+        assert "count" not in response.json()
+        assert response.json()["previous"] is None
+        assert [
+            entry["id"] for entry in response.json()["results"]
+        ] == to_event_id_list(event1, event2, event3)
+
+        response = authenticated_client.get(response.json()["next"])
+        assert response.status_code == 200
+        assert response.json()["next"] is None
+        assert [
+            entry["id"] for entry in response.json()["results"]
+        ] == to_event_id_list(event4)
+
+        response = authenticated_client.get(response.json()["previous"])
+        assert response.status_code == 200
+        assert [
+            entry["id"] for entry in response.json()["results"]
+        ] == to_event_id_list(event1, event2, event3)
+
+    def test_reverse_sort(self, authenticated_client, sequential_events):
+        event1, event2, event3, event4 = sequential_events
+
+        response = authenticated_client.get(
+            "/v1/events/", {"cursor": "", "limit": 2, "sort": "-start_time"}
+        )
+        assert [
+            entry["id"] for entry in response.json()["results"]
+        ] == to_event_id_list(event4, event3)
+
+        response = authenticated_client.get(response.json()["next"])
+        assert [
+            entry["id"] for entry in response.json()["results"]
+        ] == to_event_id_list(event2, event1)
+        assert response.json()["next"] is None
+
+    def test_same_start_time_tiebreaker(self, authenticated_client):
+        start_time = timezone.now() + timedelta(hours=1)
+        events = sorted(
+            (factories.EventFactory(start_time=start_time) for _ in range(5)),
+            key=lambda e: e.pk.hex,
+        )
+
+        seen = []
+        response = authenticated_client.get("/v1/events/", {"cursor": "", "limit": 2})
+        while True:
+            seen += [entry["id"] for entry in response.json()["results"]]
+            if response.json()["next"] is None:
+                break
+            response = authenticated_client.get(response.json()["next"])
+
+        assert seen == to_event_id_list(*events)
+
+    def test_keeps_filters(self, authenticated_client, sequential_events):
+        now = timezone.now()
+        event1, event2, event3, event4 = sequential_events
+
+        response = authenticated_client.get(
+            "/v1/events/",
+            {
+                "cursor": "",
+                "limit": 1,
+                "starts_after": (now + timedelta(hours=1)).isoformat(),
+            },
+        )
+        response = authenticated_client.get(response.json()["next"])
+        assert [
+            entry["id"] for entry in response.json()["results"]
+        ] == to_event_id_list(event3)
+
+    def test_invalid_cursor(self, authenticated_client):
+        response = authenticated_client.get("/v1/events/", {"cursor": "garbage"})
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("prefix", ["/v1/events/", "/v1/async/events/"])
+    def test_cursor_with_invalid_id(self, authenticated_client, prefix):
+        cursor = b64encode(b"s=2030-01-01T00:00:00%2B00:00&i=notauuid").decode()
+        response = authenticated_client.get(prefix, {"cursor": cursor})
+        assert response.status_code == 404
+
+
+class TestEventsListRepresentation:
+    def test_attendance_figures(self, authenticated_client, user):
+        event = factories.EventFactory(capacity=5)
+        event.attendees.add(user, factories.UserFactory())
+        other_event = factories.EventFactory(capacity=3)
+        other_event.attendees.add(factories.UserFactory())
+
+        response = authenticated_client.get("/v1/events/")
+        assert response.status_code == 200
+        results = {entry["id"]: entry for entry in response.json()["results"]}
+
+        assert "attendees" not in results[str(event.pk)]
+        assert results[str(event.pk)]["attendee_count"] == 2
+        assert results[str(event.pk)]["remaining_capacity"] == 3
+        assert results[str(event.pk)]["is_attending"] is True
+
+        assert results[str(other_event.pk)]["attendee_count"] == 1
+        assert results[str(other_event.pk)]["remaining_capacity"] == 2
+        assert results[str(other_event.pk)]["is_attending"] is False
+
+    def test_attending_filter_counts_all_attendees(self, authenticated_client, user):
+        event = factories.EventFactory(capacity=5)
+        event.attendees.add(user, factories.UserFactory(), factories.UserFactory())
+
+        response = authenticated_client.get("/v1/events/", {"attending": True})
+        assert response.json()["results"][0]["attendee_count"] == 3
+
+    def test_retrieve(self, authenticated_client):
+        event = factories.EventFactory(capacity=5)
+        event.attendees.add(factories.UserFactory())
+
+        response = authenticated_client.get(f"/v1/events/{event.pk}/")
+        assert response.status_code == 200
+        assert response.json()["remaining_capacity"] == 4
+        assert "password" not in response.json()["creator"]
+
+    def test_attendees_sub_resource(self, authenticated_client):
+        event = factories.EventFactory(capacity=5)
+        attendees = [factories.UserFactory() for _ in range(3)]
+        event.attendees.add(*attendees)
+
+        response = authenticated_client.get(
+            f"/v1/events/{event.pk}/attendees/", {"limit": 2}
+        )
+        assert response.status_code == 200
+        assert [entry["id"] for entry in response.json()["results"]] == [
+            u.pk for u in attendees[:2]
+        ]
+        assert "password" not in response.json()["results"][0]
+
+        response = authenticated_client.get(response.json()["next"])
+        assert [entry["id"] for entry in response.json()["results"]] == [
+            attendees[2].pk
+        ]
+
+
 class TestResponseToEvents:
     def test_accept_event(self, api_client, user):
         authenticate(api_client, user)
 
-        event = factories.EventFactory(capacity=1, start_time=timezone.now() + timedelta(hours=2))
+        event = factories.EventFactory(
+            capacity=1, start_time=timezone.now() + timedelta(hours=2)
+        )
         response = api_client.get("/v1/events/", {"attending": True})
         assert response.status_code == 200
         assert response.json()["count"] == 0
@@ -174,10 +337,12 @@ class TestResponseToEvents:
         assert response.status_code == 200
         assert response.json()["count"] == 1
 
+        # event is full, user goes to the waitlist
         user2 = factories.UserFactory()
         authenticate(api_client, user2)
         response = api_client.post(f"/v1/events/{event.pk}/attend/")
-        assert response.status_code == 400
+        assert response.status_code == 202
+        assert response.json() == {"waitlist_position": 1}
 
     def test_cancel_event(self, api_client, user):
         authenticate(api_client, user)
@@ -199,6 +364,233 @@ class TestResponseToEvents:
         assert response.status_code == 200
         assert response.json()["count"] == 0
 
+    def test_attendee_counter(self, api_client, user):
+        authenticate(api_client, user)
+        event = factories.EventFactory(
+            capacity=2, start_time=timezone.now() + timedelta(hours=2)
+        )
+
+        api_client.post(f"/v1/events/{event.pk}/attend/")
+        api_client.post(f"/v1/events/{event.pk}/attend/")
+        event.refresh_from_db()
+        assert event.attendee_count == 1
+
+        api_client.post(f"/v1/events/{event.pk}/cancel/")
+        api_client.post(f"/v1/events/{event.pk}/cancel/")
+        event.refresh_from_db()
+        assert event.attendee_count == 0
+
+    def test_attend_respects_counter(self, api_client, user):
+        authenticate(api_client, user)
+        event = factories.EventFactory(
+            capacity=1, start_time=timezone.now() + timedelta(hours=2)
+        )
+        events_models.Event.objects.filter(pk=event.pk).update(attendee_count=1)
+
+        response = api_client.post(f"/v1/events/{event.pk}/attend/")
+        assert response.status_code == 202
+        assert not event.attendees.filter(pk=user.pk).exists()
+
+    def test_attend_query_count_independent_of_attendees(
+        self, api_client, user, django_assert_max_num_queries
+    ):
+        authenticate(api_client, user)
+        event = factories.EventFactory(
+            capacity=100, start_time=timezone.now() + timedelta(hours=2)
+        )
+        event.attendees.add(*[factories.UserFactory() for _ in range(20)])
+
+        with django_assert_max_num_queries(9):
+            response = api_client.post(f"/v1/events/{event.pk}/attend/")
+        assert response.status_code == 204
+
+    def test_counter_follows_related_managers(self, user):
+        event = factories.EventFactory(capacity=5)
+        other_event = factories.EventFactory(capacity=5)
+
+        event.attendees.add(user, factories.UserFactory())
+        user.accepted_events.add(other_event)
+        event.refresh_from_db()
+        other_event.refresh_from_db()
+        assert (event.attendee_count, other_event.attendee_count) == (2, 1)
+
+        user.accepted_events.clear()
+        event.refresh_from_db()
+        other_event.refresh_from_db()
+        assert (event.attendee_count, other_event.attendee_count) == (1, 0)
+
+    def test_counter_follows_deleted_users(self, user):
+        event = factories.EventFactory(capacity=5)
+        event.attendees.add(user, factories.UserFactory())
+
+        user.delete()
+
+        event.refresh_from_db()
+        assert event.attendee_count == 1
+
+
+class TestWaitlist:
+    @pytest.fixture()
+    def full_event(self, user):
+        event = factories.EventFactory(
+            capacity=1,
+            start_time=timezone.now() + timedelta(hours=2),
+            end_time=timezone.now() + timedelta(hours=3),
+        )
+        event.attendees.add(user)
+        return event
+
+    def test_positions(self, api_client, full_event):
+        for position in (1, 2, 3):
+            authenticate(api_client, factories.UserFactory())
+            response = api_client.post(f"/v1/events/{full_event.pk}/attend/")
+            assert response.status_code == 202
+            assert response.json() == {"waitlist_position": position}
+
+            # repeated request keeps the place in the queue
+            response = api_client.post(f"/v1/events/{full_event.pk}/attend/")
+            assert response.json() == {"waitlist_position": position}
+
+    def test_cancel_promotes_head(self, api_client, user, full_event):
+        first, second = factories.UserFactory(), factories.UserFactory()
+        for waiting_user in (first, second):
+            authenticate(api_client, waiting_user)
+            api_client.post(f"/v1/events/{full_event.pk}/attend/")
+
+        authenticate(api_client, user)
+        response = api_client.post(f"/v1/events/{full_event.pk}/cancel/")
+        assert response.status_code == 204
+
+        full_event.refresh_from_db()
+        assert list(full_event.attendees.all()) == [first]
+        assert full_event.attendee_count == 1
+        assert list(full_event.waitlist.values_list("user_id", flat=True)) == [
+            second.pk
+        ]
+
+    def test_cancel_without_waitlist_releases_seat_once(
+        self, api_client, user, full_event
+    ):
+        authenticate(api_client, user)
+        with CaptureQueriesContext(connection) as queries:
+            api_client.post(f"/v1/events/{full_event.pk}/cancel/")
+
+        updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "event"')
+        ]
+        assert len(updates) == 1
+        full_event.refresh_from_db()
+        assert full_event.attendee_count == 0
+
+    def test_cancel_leaves_waitlist(self, api_client, full_event):
+        first, second = factories.UserFactory(), factories.UserFactory()
+        for waiting_user in (first, second):
+            authenticate(api_client, waiting_user)
+            api_client.post(f"/v1/events/{full_event.pk}/attend/")
+
+        authenticate(api_client, first)
+        response = api_client.post(f"/v1/events/{full_event.pk}/cancel/")
+        assert response.status_code == 204
+
+        authenticate(api_client, second)
+        response = api_client.post(f"/v1/events/{full_event.pk}/attend/")
+        assert response.json() == {"waitlist_position": 1}
+
+    def test_capacity_increase_promotes(self, api_client, full_event):
+        waiting_user = factories.UserFactory()
+        authenticate(api_client, waiting_user)
+        api_client.post(f"/v1/events/{full_event.pk}/attend/")
+
+        authenticate(api_client, full_event.creator)
+        response = api_client.put(
+            f"/v1/events/{full_event.pk}/",
+            {
+                "title": full_event.title,
+                "description": full_event.description,
+                "start_time": full_event.start_time.isoformat(),
+                "end_time": full_event.end_time.isoformat(),
+                "capacity": 2,
+            },
+        )
+        assert response.status_code == 200
+
+        full_event.refresh_from_db()
+        assert full_event.attendee_count == 2
+        assert full_event.attendees.filter(pk=waiting_user.pk).exists()
+        assert not full_event.waitlist.exists()
+
+    def test_capacity_increase_promotes_at_once(self, api_client, full_event):
+        waiting_users = factories.UserFactory.create_batch(3)
+        for waiting_user in waiting_users:
+            authenticate(api_client, waiting_user)
+            api_client.post(f"/v1/events/{full_event.pk}/attend/")
+
+        authenticate(api_client, full_event.creator)
+        response = api_client.put(
+            f"/v1/events/{full_event.pk}/",
+            {
+                "title": full_event.title,
+                "description": full_event.description,
+                "start_time": full_event.start_time.isoformat(),
+                "end_time": full_event.end_time.isoformat(),
+                "capacity": 3,
+            },
+        )
+        assert response.status_code == 200
+
+        full_event.refresh_from_db()
+        assert full_event.attendee_count == 3
+        assert set(full_event.attendees.all()) >= set(waiting_users[:2])
+        assert list(full_event.waitlist.values_list("user_id", flat=True)) == [
+            waiting_users[2].pk
+        ]
+
+    def test_waitlisted_user_taking_seat_leaves_waitlist(
+        self, api_client, user, full_event
+    ):
+        waiting_user = factories.UserFactory()
+        authenticate(api_client, waiting_user)
+        api_client.post(f"/v1/events/{full_event.pk}/attend/")
+        # frees the seat without promoting anyone
+        full_event.attendees.remove(user)
+
+        response = api_client.post(f"/v1/events/{full_event.pk}/attend/")
+        assert response.status_code == 204
+        assert not full_event.waitlist.exists()
+
+        response = api_client.post(f"/v1/events/{full_event.pk}/cancel/")
+        assert response.status_code == 204
+        full_event.refresh_from_db()
+        assert full_event.attendee_count == 0
+        assert not full_event.attendees.exists()
+
+    def test_deleted_attendee_frees_seat(self, api_client, user, full_event):
+        waiting_user = factories.UserFactory()
+        authenticate(api_client, waiting_user)
+        api_client.post(f"/v1/events/{full_event.pk}/attend/")
+
+        user.delete()
+
+        full_event.refresh_from_db()
+        assert full_event.attendee_count == 1
+        assert list(full_event.attendees.all()) == [waiting_user]
+        assert not full_event.waitlist.exists()
+
+    def test_newcomer_does_not_take_seat_of_waitlist(
+        self, api_client, user, full_event
+    ):
+        authenticate(api_client, factories.UserFactory())
+        api_client.post(f"/v1/events/{full_event.pk}/attend/")
+        full_event.attendees.remove(user)
+
+        authenticate(api_client, factories.UserFactory())
+        response = api_client.post(f"/v1/events/{full_event.pk}/attend/")
+
+        assert response.status_code == 202
+        assert response.json() == {"waitlist_position": 2}
+
 
 class TestCreateEvent:
     def test_create_event(self, authenticated_client):
@@ -272,6 +664,24 @@ class TestUpdateEvent:
             },
         )
         assert response.status_code == 200
+        assert "attendees" not in response.json()
+
+    def test_capacity_below_attendee_count(self, api_client, user):
+        authenticate(api_client, user)
+        event = factories.EventFactory(
+            capacity=3, start_time=timezone.now() + timedelta(hours=2), creator=user
+        )
+        event.attendees.add(user, factories.UserFactory())
+
+        response = api_client.patch(f"/v1/events/{event.pk}/", {"capacity": 1})
+        assert response.status_code == 400
+        assert "capacity" in response.json()
+
+        response = api_client.patch(f"/v1/events/{event.pk}/", {"capacity": 2})
+        assert response.status_code == 200
+        assert response.json()["title"] == event.title
+        event.refresh_from_db()
+        assert event.capacity == 2
 
     def test_update_event_permissions(self, authenticated_client):
         event = factories.EventFactory()
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from tests import factories
+from tests.utils import authenticate
+
+
+pytestmark = pytest.mark.django_db
+
+
+def content(response):
+    assert response.streaming
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.fixture()
+def event(user):
+    event = factories.EventFactory(
+        creator=user, capacity=10, start_time=timezone.now() + timedelta(hours=2)
+    )
+    event.attendees.add(*factories.UserFactory.create_batch(3))
+    return event
+
+
+def test_export_events_csv(authenticated_client, event):
+    factories.EventFactory(start_time=timezone.now() - timedelta(days=1))
+
+    response = authenticated_client.get(
+        "/v1/events/export/", {"format": "csv", "status": "upcoming"}
+    )
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+
+    rows = list(csv.DictReader(io.StringIO(content(response))))
+    assert len(rows) == 1
+    assert rows[0]["id"] == str(event.pk)
+    assert rows[0]["attendee_count"] == "3"
+    assert rows[0]["creator_username"] == event.creator.username
+
+
+def test_export_csv_escapes_formulas(authenticated_client, event):
+    event.title = "=HYPERLINK('http://example.com')"
+    event.save()
+
+    response = authenticated_client.get("/v1/events/export/", {"format": "csv"})
+
+    (row,) = csv.DictReader(io.StringIO(content(response)))
+    assert row["title"] == "'=HYPERLINK('http://example.com')"
+    assert row["start_time"] == event.start_time.isoformat().replace("+00:00", "Z")
+
+
+def test_export_events_ndjson(authenticated_client, event):
+    response = authenticated_client.get("/v1/events/export/", {"format": "ndjson"})
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+
+    (row,) = [json.loads(line) for line in content(response).splitlines()]
+    detail = authenticated_client.get(f"/v1/events/{event.pk}/").json()
+    for field in ("id", "title", "start_time", "end_time", "attendee_count"):
+        assert row[field] == detail[field]
+
+
+def test_export_chunks(authenticated_client, event, monkeypatch):
+    from events import renderers
+
+    monkeypatch.setattr(renderers.StreamingRenderer, "rows_per_chunk", 2)
+    response = authenticated_client.get(
+        f"/v1/events/{event.pk}/attendees/export/", {"format": "csv"}
+    )
+    chunks = list(response.streaming_content)
+    # header with the first attendee, then the remaining two
+    assert len(chunks) == 2
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [int(row["id"]) for row in rows] == sorted(
+        event.attendees.values_list("pk", flat=True)
+    )
+    assert set(rows[0]) == {"id", "username", "email"}
+
+
+def test_export_attendees_owner_only(api_client, event):
+    authenticate(api_client, factories.UserFactory())
+    response = api_client.get(
+        f"/v1/events/{event.pk}/attendees/export/", {"format": "ndjson"}
+    )
+    assert response.status_code == 403
+    assert json.loads(response.content) == {
+        "detail": "You do not have permission to perform this action."
+    }
+
+
+def test_export_unknown_format(authenticated_client, event):
+    response = authenticated_client.get("/v1/events/export/", {"format": "xml"})
+    assert response.status_code == 404
+
+
+def test_export_invalid_filter(authenticated_client, event):
+    response = authenticated_client.get(
+        "/v1/events/export/", {"format": "csv", "status": "unknown"}
+    )
+    assert response.status_code == 400
+    assert "status" in response.content.decode()
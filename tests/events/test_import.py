@@ -0,0 +1,172 @@
+import csv
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from events import importing
+from events import models as events_models
+from tests import factories
+
+
+pytestmark = pytest.mark.django_db
+
+
+def write_ndjson(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(path)
+
+
+def event_record(owner, **fields):
+    start_time = timezone.now() - timedelta(days=30)
+    return {
+        "title": "Imported",
+        "description": "From a partner",
+        "start_time": start_time.isoformat(),
+        "end_time": (start_time + timedelta(hours=2)).isoformat(),
+        "capacity": 2,
+        "creator": owner.pk,
+        **fields,
+    }
+
+
+def test_import_events(tmp_path, user):
+    event_id = "0f6d4b5e-8a52-4c55-a3c5-8f3b2a2d1e01"
+    path = write_ndjson(
+        tmp_path / "events.ndjson",
+        [
+            event_record(user, id=event_id),
+            event_record(user),
+            event_record(user, capacity=0),
+            event_record(user, end_time="2000-01-01T00:00:00Z"),
+            event_record(user, creator=user.pk + 1000),
+        ],
+    )
+    rejects = tmp_path / "rejects.ndjson"
+
+    call_command("import_events", "events", path, "--rejects", str(rejects))
+
+    assert events_models.Event.objects.count() == 2
+    assert events_models.Event.objects.filter(pk=event_id, capacity=2).exists()
+    rejected = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert [entry["record"] for entry in rejected] == [2, 3, 4]
+    assert rejected[2]["error"] == "Creator does not exist"
+
+
+def test_missing_text_is_rejected(tmp_path, user):
+    path = write_ndjson(
+        tmp_path / "events.ndjson",
+        [event_record(user, title=None), event_record(user, description=1)],
+    )
+    rejects = tmp_path / "rejects.ndjson"
+
+    call_command("import_events", "events", path, "--rejects", str(rejects))
+
+    assert not events_models.Event.objects.exists()
+    rejected = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert [entry["error"] for entry in rejected] == [
+        "Title has to be a string",
+        "Description has to be a string",
+    ]
+
+
+def test_import_events_csv(tmp_path, user):
+    path = tmp_path / "events.csv"
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(event_record(user)))
+        writer.writeheader()
+        writer.writerows([event_record(user), event_record(user, title="Second")])
+
+    call_command("import_events", "events", str(path))
+
+    assert set(events_models.Event.objects.values_list("title", flat=True)) == {
+        "Imported",
+        "Second",
+    }
+
+
+def test_import_is_resumable(tmp_path, user):
+    path = write_ndjson(
+        tmp_path / "events.ndjson", [event_record(user) for _ in range(5)]
+    )
+    # first 2 records were imported before a crash
+    importing.Checkpoint(f"{path}.checkpoint").save({"records": 2, "rejected": 0})
+
+    call_command("import_events", "events", path, "--batch-size", "2")
+    assert events_models.Event.objects.count() == 3
+
+    state = json.loads((tmp_path / "events.ndjson.checkpoint").read_text())
+    assert state == {"records": 5, "rejected": 0}
+
+    # whole file again, already imported records aren't duplicated
+    call_command("import_events", "events", path, "--restart")
+    assert events_models.Event.objects.count() == 5
+    state = json.loads((tmp_path / "events.ndjson.checkpoint").read_text())
+    assert state == {"records": 5, "rejected": 0}
+
+
+def test_import_of_another_file_with_same_name(tmp_path, user):
+    path = write_ndjson(tmp_path / "events.ndjson", [event_record(user)])
+    call_command("import_events", "events", path)
+
+    path = write_ndjson(
+        tmp_path / "events.ndjson",
+        [event_record(user, title="Other"), event_record(user, title="Another")],
+    )
+    rejects = tmp_path / "rejects.ndjson"
+    call_command(
+        "import_events", "events", path, "--restart", "--rejects", str(rejects)
+    )
+
+    assert set(events_models.Event.objects.values_list("title", flat=True)) == {
+        "Imported",
+        "Other",
+        "Another",
+    }
+    assert not rejects.exists() or not rejects.read_text()
+
+
+def test_existing_events_are_rejected(tmp_path, user):
+    event = factories.EventFactory()
+    path = write_ndjson(
+        tmp_path / "events.ndjson", [event_record(user, id=str(event.pk))]
+    )
+    rejects = tmp_path / "rejects.ndjson"
+
+    call_command("import_events", "events", path, "--rejects", str(rejects))
+
+    event.refresh_from_db()
+    assert event.title != "Imported"
+    (rejected,) = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert rejected["error"] == "Event already exists"
+
+
+def test_import_attendees(tmp_path, user):
+    event = factories.EventFactory(capacity=2)
+    event.attendees.add(user)
+    users = factories.UserFactory.create_batch(3)
+    path = write_ndjson(
+        tmp_path / "attendees.ndjson",
+        [
+            {"event": str(event.pk), "user": user.pk},
+            {"event": str(event.pk), "user": users[0].pk},
+            {"event": str(event.pk), "user": users[0].pk},
+            {"event": str(event.pk), "user": users[1].pk},
+            {"event": "not-an-id", "user": users[2].pk},
+        ],
+    )
+    rejects = tmp_path / "rejects.ndjson"
+
+    call_command("import_events", "attendees", path, "--rejects", str(rejects))
+
+    event.refresh_from_db()
+    assert event.attendee_count == 2
+    assert set(event.attendees.values_list("pk", flat=True)) == {user.pk, users[0].pk}
+
+    rejected = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert [(entry["record"], entry["error"]) for entry in rejected] == [
+        (3, "Event is full"),
+        (4, "badly formed hexadecimal UUID string"),
+    ]
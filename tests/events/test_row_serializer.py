@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from drf_spectacular.generators import SchemaGenerator
+
+from events import models as events_models
+from events import serializers as events_serializers
+from tests import factories
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def events(user):
+    start_time = timezone.now() + timedelta(hours=1, microseconds=123456)
+    attended, *others = [
+        factories.EventFactory(
+            title=title,
+            start_time=start_time + timedelta(days=index),
+            end_time=start_time + timedelta(days=index, hours=2),
+            capacity=index + 1,
+        )
+        for index, title in enumerate(("Attended", "Koncert v Praze ✓", "Other"))
+    ]
+    attended.attendees.add(user)
+    events_models.Event.objects.recount_attendees()
+    return [attended, *others]
+
+
+def queryset(user):
+    return (
+        events_models.Event.objects.select_related("creator")
+        .with_attendance(user)
+        .order_by("start_time")
+    )
+
+
+@pytest.mark.parametrize("time_zone", ["UTC", "Europe/Prague"])
+def test_same_as_list_serializer(user, events, time_zone):
+    with timezone.override(time_zone):
+        expected = events_serializers.EventListSerializer(
+            queryset(user), many=True
+        ).data
+        rows = events_serializers.EventRowSerializer.rows(queryset(user))
+        actual = events_serializers.EventRowSerializer(rows, many=True).data
+
+    assert actual == expected
+    assert [list(event) for event in actual] == [list(event) for event in expected]
+    assert actual[0]["is_attending"] is True
+    assert actual[0]["attendee_count"] == 1
+
+
+def test_matches_schema(user, events):
+    schemas = SchemaGenerator().get_schema(request=None, public=True)["components"][
+        "schemas"
+    ]
+    rows = events_serializers.EventRowSerializer.rows(queryset(user))
+    event = events_serializers.EventRowSerializer(rows.first()).data
+
+    assert list(event) == list(schemas["EventList"]["properties"])
+    assert list(event["creator"]) == [
+        name
+        for name, field in schemas["User"]["properties"].items()
+        if not field.get("writeOnly")
+    ]
+
+
+def test_endpoints(authenticated_client, user, events):
+    expected = events_serializers.EventListSerializer(queryset(user), many=True).data
+
+    response = authenticated_client.get("/v1/events/")
+    assert response.json()["results"] == expected
+
+    response = authenticated_client.get("/v1/events/", {"cursor": "", "limit": 1})
+    assert response.json()["results"] == expected[:1]
+    response = authenticated_client.get(response.json()["next"])
+    assert response.json()["results"] == expected[1:2]
+
+    response = authenticated_client.get(f"/v1/events/{events[1].pk}/")
+    assert response.json() == expected[1]
+
+
+def test_count_does_not_join_creator(authenticated_client, events):
+    with CaptureQueriesContext(connection) as queries:
+        authenticated_client.get("/v1/events/")
+
+    count, page = [query["sql"] for query in queries]
+    assert "COUNT(*)" in count and "auth_user" not in count
+    assert "auth_user" in page
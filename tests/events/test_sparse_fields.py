@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from events import models as events_models
+from events import serializers as events_serializers
+from tests import factories
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def events(user):
+    start_time = timezone.now() + timedelta(hours=1)
+    events = [
+        factories.EventFactory(start_time=start_time + timedelta(days=index))
+        for index in range(3)
+    ]
+    events[0].attendees.add(user, factories.UserFactory())
+    events_models.Event.objects.recount_attendees()
+    return events
+
+
+@pytest.mark.parametrize("prefix", ["/v1/events/", "/v1/async/events/"])
+def test_fields(authenticated_client, events, prefix):
+    response = authenticated_client.get(
+        prefix, {"fields": "attendee_count,title,creator"}
+    )
+
+    event = response.json()["results"][0]
+    assert list(event) == ["title", "creator", "attendee_count"]
+    assert event["creator"]["username"] == events[0].creator.username
+
+    response = authenticated_client.get(
+        f"{prefix}{events[1].pk}/", {"fields": "id,is_attending"}
+    )
+    assert response.json() == {"id": str(events[1].pk), "is_attending": False}
+
+
+def test_columns_of_other_fields_are_not_fetched(authenticated_client, events):
+    with CaptureQueriesContext(connection) as queries:
+        authenticated_client.get("/v1/events/", {"fields": "title", "cursor": ""})
+
+    (page,) = [query["sql"] for query in queries]
+    assert "auth_user" not in page
+    assert "description" not in page
+    assert "EXISTS" not in page
+
+
+def test_keyset_cursor_without_key_fields(authenticated_client, events):
+    response = authenticated_client.get(
+        "/v1/events/", {"fields": "title", "cursor": "", "limit": 2}
+    )
+    response = authenticated_client.get(response.json()["next"])
+
+    assert response.json()["results"] == [{"title": events[2].title}]
+
+
+@pytest.mark.parametrize("prefix", ["/v1/events/", "/v1/async/events/"])
+def test_expand_attendees(authenticated_client, user, events, prefix):
+    with CaptureQueriesContext(connection) as queries:
+        response = authenticated_client.get(
+            prefix, {"fields": "id", "expand": "attendees"}
+        )
+
+    results = response.json()["results"]
+    assert [list(event) for event in results] == [
+        ["id", "attendees", "attendees_url"]
+    ] * 3
+    assert sorted(attendee["id"] for attendee in results[0]["attendees"]) == sorted(
+        events[0].attendees.values_list("id", flat=True)
+    )
+    assert {"id": user.pk, "username": user.username, "email": user.email} in (
+        results[0]["attendees"]
+    )
+    assert results[0]["attendees_url"] == (
+        f"http://testserver/v1/events/{events[0].pk}/attendees/"
+    )
+    assert results[1]["attendees"] == []
+    if prefix == "/v1/events/":
+        assert len(queries) == 3
+
+    response = authenticated_client.get(
+        f"{prefix}{events[0].pk}/", {"expand": "attendees"}
+    )
+    assert list(response.json())[-2:] == ["attendees", "attendees_url"]
+    assert len(response.json()["attendees"]) == 2
+
+
+def test_expanded_attendees_are_capped(authenticated_client, events, monkeypatch):
+    monkeypatch.setattr(events_serializers.EventRowSerializer, "expand_limit", 2)
+    attendees = factories.UserFactory.create_batch(3)
+    events[0].attendees.add(*attendees)
+    events[1].attendees.add(*attendees)
+
+    response = authenticated_client.get(
+        "/v1/events/", {"fields": "id", "expand": "attendees"}
+    )
+
+    first, second, _ = response.json()["results"]
+    assert [attendee["id"] for attendee in first["attendees"]] == sorted(
+        events[0].attendees.values_list("id", flat=True)
+    )[:2]
+    assert [attendee["id"] for attendee in second["attendees"]] == [
+        attendee.pk for attendee in attendees[:2]
+    ]
+
+
+@pytest.mark.parametrize("prefix", ["/v1/events/", "/v1/async/events/"])
+@pytest.mark.parametrize(
+    "params", [{"fields": "title,password"}, {"expand": "creator"}]
+)
+def test_unknown_fields(authenticated_client, events, prefix, params):
+    response = authenticated_client.get(prefix, params)
+
+    assert response.status_code == 400
+    assert "Unknown field(s)" in response.json()[next(iter(params))][0]
@@ -0,0 +1,163 @@
+import json
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from events import broadcast as events_broadcast
+from tests import factories
+from tiko import broker
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def event():
+    return factories.EventFactory(
+        start_time=timezone.now() + timedelta(hours=2), capacity=2
+    )
+
+
+def parse(chunk: bytes) -> tuple[str, dict]:
+    name, data = chunk.decode().strip().split("\n")
+    return name.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def bearer(user) -> dict:
+    return {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+def consume(user, event_id, count, after_subscribe=None, ticket=None):
+    """
+    First ``count`` chunks of the stream, ``after_subscribe`` is called
+    once the first one arrived
+    """
+
+    @async_to_sync
+    async def read():
+        if ticket is None:
+            response = await AsyncClient().get(
+                f"/v1/async/events/{event_id}/stream/", headers=bearer(user)
+            )
+        else:
+            response = await AsyncClient().get(
+                f"/v1/async/events/{event_id}/stream/", {"ticket": ticket}
+            )
+        assert response["Content-Type"] == "text/event-stream"
+        chunks = response.streaming_content
+        try:
+            received = [await anext(chunks)]
+            if after_subscribe is not None:
+                await sync_to_async(after_subscribe)()
+            while len(received) < count:
+                received.append(await anext(chunks))
+        finally:
+            await chunks.aclose()
+        return received
+
+    return read()
+
+
+def test_pushes_attendance(user, event, django_capture_on_commit_callbacks):
+    def attend():
+        with django_capture_on_commit_callbacks(execute=True):
+            event.attendees.add(factories.UserFactory())
+
+    first, pushed = consume(user, event.pk, 2, attend)
+
+    assert parse(first) == (
+        "attendance",
+        {
+            "id": str(event.pk),
+            "capacity": 2,
+            "attendee_count": 0,
+            "remaining_capacity": 2,
+            "status": "upcoming",
+            "updated_at": parse(first)[1]["updated_at"],
+        },
+    )
+    name, snapshot = parse(pushed)
+    assert name == "attendance"
+    assert snapshot["attendee_count"] == 1
+    assert snapshot["remaining_capacity"] == 1
+    assert not broker.get_broker().has_subscribers(events_broadcast.channel(event.pk))
+
+
+def test_resync_and_deletion(user, event, settings):
+    settings.EVENTS_STREAM_RESYNC = 0.01
+
+    def change_unpublished():
+        # as if changed by another worker
+        type(event).objects.filter(pk=event.pk).update(capacity=5)
+
+    _, resynced = consume(user, event.pk, 2, change_unpublished)
+    assert parse(resynced)[1]["capacity"] == 5
+
+    _, deleted = consume(user, event.pk, 2, event.delete)
+    assert deleted == b"event: deleted\ndata: {}\n\n"
+
+
+def test_attend_and_cancel_publish(
+    authenticated_client, event, django_capture_on_commit_callbacks, monkeypatch
+):
+    published = []
+    monkeypatch.setattr(events_broadcast, "publish", published.append)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        authenticated_client.post(f"/v1/events/{event.pk}/attend/")
+        authenticated_client.post(f"/v1/events/{event.pk}/cancel/")
+
+    assert published == [[event.pk], [event.pk]]
+
+
+def test_publish_only_subscribed(event, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        events_broadcast.publish([event.pk])
+
+
+def test_not_found(user):
+    missing = factories.EventFactory.build()
+
+    response = async_to_sync(AsyncClient().get)(
+        f"/v1/async/events/{missing.pk}/stream/", headers=bearer(user)
+    )
+
+    assert response.status_code == 404
+
+
+def test_not_served_by_wsgi(authenticated_client, event):
+    response = authenticated_client.get(f"/v1/async/events/{event.pk}/stream/")
+
+    assert response.status_code == 501
+
+
+def test_ticket(authenticated_client, user, event):
+    url = f"/v1/async/events/{event.pk}/stream/ticket/"
+    response = authenticated_client.post(url)
+    assert response.status_code == 201
+    ticket = response.json()["ticket"]
+
+    (first,) = consume(user, event.pk, 1, ticket=ticket)
+    assert parse(first)[1]["id"] == str(event.pk)
+
+    other = factories.EventFactory(start_time=event.start_time)
+    assert events_broadcast.check_ticket(ticket, other.pk) is None
+    missing = factories.EventFactory.build()
+    response = authenticated_client.post(
+        f"/v1/async/events/{missing.pk}/stream/ticket/"
+    )
+    assert response.status_code == 404
+
+
+def test_invalid_ticket(event, settings):
+    url = f"/v1/async/events/{event.pk}/stream/"
+    get = async_to_sync(AsyncClient().get)
+
+    assert get(url, {"ticket": "forged"}).status_code == 401
+
+    settings.EVENTS_STREAM_TICKET_MAX_AGE = -1
+    ticket = events_broadcast.issue_ticket(event.pk, 1)
+    assert get(url, {"ticket": ticket}).status_code == 401
@@ -1,7 +1,17 @@
+import time
+from datetime import timedelta
+
+import jwt
 import pytest
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import Token, RefreshToken
 
+from profiles.authentication import CachedJWTAuthentication, ClaimsCache
 from tests import const, factories
+from tests.utils import authenticate
 
 pytestmark = pytest.mark.django_db
 
@@ -15,3 +25,109 @@ def test_auth_with_token(api_client):
     assert response.status_code == 200, response.content
     assert "refresh" in response.json()
     assert "access" in response.json()
+
+
+@pytest.fixture()
+def claims_cache():
+    CachedJWTAuthentication.cache.clear()
+    yield CachedJWTAuthentication.cache
+    CachedJWTAuthentication.cache.clear()
+
+
+def test_user_row_is_not_loaded(api_client, user, claims_cache):
+    authenticate(api_client, user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get("/v1/events/", {"attending": True})
+    assert response.status_code == 200
+    assert not [q for q in queries if "auth_user" in q["sql"]]
+
+
+def test_token_is_validated_once(api_client, user, claims_cache, monkeypatch):
+    authenticate(api_client, user)
+    validations = []
+    validate = JWTAuthentication.get_validated_token
+
+    def counting_validate(self, raw_token):
+        validations.append(raw_token)
+        return validate(self, raw_token)
+
+    monkeypatch.setattr(JWTAuthentication, "get_validated_token", counting_validate)
+
+    for _ in range(3):
+        assert api_client.get("/v1/events/").status_code == 200
+    assert len(validations) == 1
+
+
+def test_forged_token_with_known_id(api_client, user, claims_cache):
+    token = RefreshToken.for_user(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert api_client.get("/v1/events/").status_code == 200
+
+    forged = jwt.encode(
+        {**token.payload, "user_id": factories.UserFactory().pk},
+        "not the secret key this deployment signs tokens with",
+        algorithm="HS256",
+    )
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {forged}")
+    assert api_client.get("/v1/events/").status_code == 401
+
+
+def test_deleted_user(api_client, user, claims_cache):
+    authenticate(api_client, user)
+    user.delete()
+
+    response = api_client.post(
+        "/v1/events/",
+        {
+            "title": "event",
+            "description": "event",
+            "start_time": (timezone.now() + timedelta(hours=2)).isoformat(),
+            "end_time": (timezone.now() + timedelta(hours=3)).isoformat(),
+        },
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("prefix", ["/v1/events/", "/v1/async/events/"])
+def test_deleted_user_attends(api_client, user, claims_cache, settings, prefix):
+    # transactions really commit here, SQLite runs BEGIN as a query
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "ENABLED": False}
+    event = factories.EventFactory(start_time=timezone.now() + timedelta(hours=2))
+    authenticate(api_client, user)
+    # the token stays valid, foreign keys are checked on commit
+    user.delete()
+
+    response = api_client.post(f"{prefix}{event.pk}/attend/")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "User not found"}
+    event.refresh_from_db()
+    assert event.attendee_count == 0
+
+
+class TestClaimsCache:
+    def test_bounded(self):
+        cache = ClaimsCache(max_size=2, ttl=60)
+        token = {"exp": time.time() + 60}
+        for token_id in ("a", "b", "c"):
+            cache.set(token_id, token_id.encode(), token)
+
+        assert cache.get("a", b"a") is None
+        assert cache.get("c", b"c") is token
+
+    def test_expires_with_token(self):
+        cache = ClaimsCache(max_size=2, ttl=60)
+        cache.set("a", b"a", {"exp": time.time() - 1})
+        assert cache.get("a", b"a") is None
+
+
+def test_documented_as_bearer_jwt(api_client):
+    response = api_client.get("/api/schema/", {"format": "json"})
+    schemes = response.json()["components"]["securitySchemes"]
+    assert schemes["jwtAuth"] == {
+        "type": "http",
+        "scheme": "bearer",
+        "bearerFormat": "JWT",
+    }
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from prometheus_client import REGISTRY
+
+from profiles import hashing
+from tests import const, factories
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def busy_executor(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(hashing.executor, "_slots", slots)
+
+
+def test_signup_password_is_hashed(api_client):
+    response = api_client.post(
+        "/v1/profile/signup/",
+        {"username": "user", "password": "password", "email": "Test@EXAMPLE.com"},
+    )
+    assert response.status_code == 201
+
+    user = get_user_model().objects.get(username="user")
+    assert user.check_password("password")
+    assert user.email == "Test@example.com"
+
+
+def test_wrong_password(api_client):
+    user = factories.UserFactory()
+    response = api_client.post(
+        "/v1/profile/token/", {"username": user.username, "password": "wrong"}
+    )
+    assert response.status_code == 401
+
+
+def test_full_queue_is_rejected(api_client, busy_executor):
+    user = factories.UserFactory()
+    response = api_client.post(
+        "/v1/profile/token/",
+        {"username": user.username, "password": const.DEFAULT_PASSWORD},
+    )
+    assert response.status_code == 503
+
+
+@pytest.mark.parametrize(
+    "processes, threads, expected",
+    [(1, 0, (8, 64)), (4, 0, (2, 16)), (9, 4, (1, 2)), (2, 2, (4, 0))],
+)
+def test_pool_is_split_among_processes(processes, threads, expected):
+    config = {"WORKERS": 8, "MAX_QUEUE": 64, "PROCESSES": processes}
+
+    assert hashing.pool_size({**config, "THREADS": threads}) == expected
+
+
+class TestHashingExecutor:
+    def test_queue_depth(self):
+        executor = hashing.HashingExecutor(kind="thread", workers=1, max_queue=1)
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        runners = [
+            threading.Thread(target=executor.run, args=(block,)) for _ in range(2)
+        ]
+        for runner in runners:
+            runner.start()
+        started.wait()
+        while executor.in_flight < 2:
+            time.sleep(0.001)
+
+        assert executor.queue_depth == 1
+        assert REGISTRY.get_sample_value("tiko_password_hashing_in_flight") == 2
+        assert REGISTRY.get_sample_value("tiko_password_hashing_queue_depth") == 1
+        with pytest.raises(hashing.HashingQueueFull):
+            executor.run(block)
+
+        release.set()
+        for runner in runners:
+            runner.join()
+        assert executor.queue_depth == 0
+        assert REGISTRY.get_sample_value("tiko_password_hashing_queue_depth") == 0
+
+    def test_process_pool(self):
+        executor = hashing.HashingExecutor(kind="process", workers=1, max_queue=1)
+        encoded = executor.run(hashing.hashers.make_password, "password")
+        executor.get_executor().shutdown()
+        assert hashing.hashers.check_password("password", encoded)
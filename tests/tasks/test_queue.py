@@ -0,0 +1,178 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from events import serializers as events_serializers
+from events import tasks as events_tasks
+from tasks import models as tasks_models
+from tasks import queue
+from tasks import worker as tasks_worker
+from tests import factories
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def calls(monkeypatch):
+    calls = []
+    monkeypatch.setitem(queue.registry, "tests.record", record)
+    monkeypatch.setitem(queue.registry, "tests.record_batch", record_batch)
+    monkeypatch.setitem(queue.registry, "tests.flaky", flaky)
+    monkeypatch.setattr(queue, "calls", calls, raising=False)
+    return calls
+
+
+@queue.task("tests.record")
+def record(value):
+    queue.calls.append(value)
+
+
+@queue.task("tests.record_batch", batch_size=2)
+def record_batch(batch):
+    queue.calls.append([kwargs["value"] for kwargs in batch])
+
+
+@queue.task("tests.flaky", max_attempts=2, retry_delay=0)
+def flaky(value):
+    queue.calls.append(value)
+    raise ValueError(value)
+
+
+def run_worker():
+    # one thread: concurrent writes to the shared-cache in-memory test database
+    # fail with "table is locked" right away instead of waiting for the lock
+    tasks_worker.Worker(concurrency=1, batch_size=10, lease=60).run(0, once=True)
+
+
+def test_deferred_within_transaction(calls):
+    with transaction.atomic():
+        record.defer(value=1)
+        assert list(tasks_models.Task.objects.values_list("name", "kwargs")) == [
+            ("tests.record", {"value": 1})
+        ]
+
+    with pytest.raises(ValueError), transaction.atomic():
+        record.defer(value=2)
+        raise ValueError
+    assert tasks_models.Task.objects.count() == 1
+
+
+def test_duplicates_are_coalesced(calls):
+    record.enqueue([{"value": 1}, {"value": 1}, {"value": 2}])
+    record.enqueue([{"value": 2}])
+
+    assert tasks_models.Task.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_runs_and_deletes(calls):
+    record.enqueue([{"value": 1}, {"value": 2}])
+    record_batch.enqueue([{"value": value} for value in range(3)])
+
+    run_worker()
+
+    assert sorted(call for call in calls if not isinstance(call, list)) == [1, 2]
+    assert sorted(call for call in calls if isinstance(call, list)) == [[0, 1], [2]]
+    assert not tasks_models.Task.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retries_then_fails(calls):
+    flaky.enqueue([{"value": 1}])
+
+    run_worker()
+
+    assert calls == [1, 1]
+    task = tasks_models.Task.objects.get()
+    assert task.status == tasks_models.Task.FAILED
+    assert task.attempts == 2
+    assert "ValueError: 1" in task.last_error
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retry_is_delayed(calls, monkeypatch):
+    monkeypatch.setitem(
+        queue.registry, "tests.flaky", queue.TaskFunction(flaky.func, "tests.flaky")
+    )
+    flaky.enqueue([{"value": 1}])
+
+    run_worker()
+
+    task = tasks_models.Task.objects.get()
+    assert task.status == tasks_models.Task.PENDING
+    assert task.run_at > timezone.now() + timedelta(seconds=5)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_expired_lease_is_claimed_again(calls):
+    record.enqueue([{"value": 1}])
+    tasks_models.Task.objects.update(
+        status=tasks_models.Task.RUNNING,
+        locked_until=timezone.now() - timedelta(seconds=1),
+    )
+
+    run_worker()
+
+    assert calls == [1]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_unknown_task_fails():
+    tasks_models.Task.objects.create(name="tests.missing", key="missing")
+
+    run_worker()
+
+    assert tasks_models.Task.objects.get().status == tasks_models.Task.FAILED
+
+
+def test_eager(calls, settings, django_capture_on_commit_callbacks):
+    settings.TASKS = {**settings.TASKS, "EAGER": True}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        record.defer_many([{"value": 1}, {"value": 1}])
+        assert calls == []
+
+    assert calls == [1]
+    assert not tasks_models.Task.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command(calls):
+    record.enqueue([{"value": 1}])
+
+    call_command("run_tasks", "--once", "--concurrency", "1")
+
+    assert calls == [1]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_registrations_send_coalesced_signals(authenticated_client, user, settings):
+    # transactions really commit here, SQLite runs BEGIN as a query
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "ENABLED": False}
+    event = factories.EventFactory(
+        start_time=timezone.now() + timedelta(hours=1), capacity=1
+    )
+    waitlisted = factories.UserFactory()
+    received = []
+
+    def receiver(event_id, user_id, **kwargs):
+        received.append((event_id, user_id))
+
+    events_tasks.attendance_changed.connect(receiver)
+    try:
+        authenticated_client.post(f"/v1/events/{event.pk}/attend/")
+        events_serializers.EventSerializer().attend(event, waitlisted)
+        # the waitlisted user takes the seat
+        authenticated_client.post(f"/v1/events/{event.pk}/cancel/")
+        assert tasks_models.Task.objects.count() == 2
+
+        run_worker()
+    finally:
+        events_tasks.attendance_changed.disconnect(receiver)
+
+    assert sorted(received) == sorted(
+        [(str(event.pk), user.pk), (str(event.pk), waitlisted.pk)]
+    )
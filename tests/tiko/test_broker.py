@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+from tiko import broker
+
+
+def test_fan_out_from_other_threads():
+    async def main():
+        event_broker = broker.InMemoryBroker()
+        first = event_broker.subscribe("events:1")
+        second = event_broker.subscribe("events:1")
+        other = event_broker.subscribe("events:2")
+
+        publisher = threading.Thread(
+            target=event_broker.publish, args=("events:1", {"count": 1})
+        )
+        publisher.start()
+        publisher.join()
+
+        assert await first.get() == await second.get() == {"count": 1}
+        assert other.queue.empty()
+
+        first.close()
+        second.close()
+        assert not event_broker.has_subscribers("events:1")
+        assert event_broker.has_subscribers("events:2")
+
+    asyncio.run(main())
+
+
+def test_keeps_latest_message():
+    async def main():
+        event_broker = broker.InMemoryBroker()
+        subscription = event_broker.subscribe("events:1")
+
+        for count in range(3):
+            event_broker.publish("events:1", {"count": count})
+        await asyncio.sleep(0)
+
+        assert await subscription.get() == {"count": 2}
+        assert subscription.queue.empty()
+
+    asyncio.run(main())
+
+
+def test_closed_loop_unsubscribes():
+    event_broker = broker.InMemoryBroker()
+
+    async def subscribe():
+        event_broker.subscribe("events:1")
+
+    asyncio.run(subscribe())
+    event_broker.publish("events:1", {"count": 1})
+
+    assert not event_broker.has_subscribers("events:1")
@@ -0,0 +1,101 @@
+import gzip
+import json
+from datetime import timedelta
+
+import brotli
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from django.utils import timezone
+
+from tests import factories
+from tiko import compression
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("*", "br"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate(header, expected):
+    assert compression.negotiate(header) == expected
+
+
+def test_negotiate_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+    assert compression.negotiate("br, gzip") == "gzip"
+    assert compression.negotiate("br") is None
+
+
+def process(response, accept_encoding):
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+    middleware = compression.CompressionMiddleware(lambda request: response)
+    return middleware(request)
+
+
+def test_compresses_above_threshold(settings):
+    content = b'{"title": "Event"}' * 100
+    response = process(
+        HttpResponse(content, content_type="application/json"), "gzip, br"
+    )
+
+    assert response["Content-Encoding"] == "br"
+    assert response["Vary"] == "Accept-Encoding"
+    assert brotli.decompress(response.content) == content
+    assert int(response["Content-Length"]) == len(response.content)
+
+    settings.COMPRESSION = {"MIN_SIZE": len(content) + 1}
+    response = process(HttpResponse(content, content_type="application/json"), "br")
+    assert not response.has_header("Content-Encoding")
+    assert response.content == content
+
+
+def test_weakens_etag():
+    response = HttpResponse(
+        b"a" * 2000, content_type="text/csv", headers={"ETag": '"1"'}
+    )
+
+    response = process(response, "gzip")
+
+    assert response["ETag"] == 'W/"1"'
+    assert gzip.decompress(response.content) == b"a" * 2000
+
+
+def test_skips_other_types():
+    response = process(HttpResponse(b"a" * 2000, content_type="image/png"), "gzip")
+
+    assert not response.has_header("Content-Encoding")
+    assert not response.has_header("Vary")
+
+
+@pytest.mark.parametrize("coding", ["br", "gzip"])
+def test_streaming(coding):
+    chunks = [b"id,title\n", b"1,Event\n" * 500]
+    response = process(
+        StreamingHttpResponse(iter(chunks), content_type="text/csv"), coding
+    )
+
+    content = b"".join(response.streaming_content)
+    decompress = brotli.decompress if coding == "br" else gzip.decompress
+    assert response["Content-Encoding"] == coding
+    assert decompress(content) == b"".join(chunks)
+
+
+def test_api(authenticated_client):
+    factories.EventFactory.create_batch(
+        20, start_time=timezone.now() + timedelta(hours=1)
+    )
+
+    response = authenticated_client.get("/v1/events/", HTTP_ACCEPT_ENCODING="gzip")
+
+    assert response["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(response.content))["results"]) == 20
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+# the way gunicorn preloads the app: configuration first, then the app
+PRELOAD = """
+import runpy
+runpy.run_path("gunicorn.conf.py")
+from tiko import metrics
+metrics.HASHING_IN_FLIGHT.inc()
+"""
+
+
+def test_metrics_dir_is_created_before_app_is_loaded(tmp_path):
+    metrics_dir = tmp_path / "tiko-metrics"
+
+    subprocess.run(
+        [sys.executable, "-c", PRELOAD],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(metrics_dir)},
+        check=True,
+    )
+
+    assert any(path.name.startswith("gauge_livesum") for path in metrics_dir.iterdir())
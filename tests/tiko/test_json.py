@@ -0,0 +1,89 @@
+import io
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework import exceptions, renderers
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from tests import factories
+from tiko import parsers as tiko_parsers
+from tiko import renderers as tiko_renderers
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"id": uuid.uuid4(), "time": datetime(2024, 5, 1, 12, tzinfo=dt_timezone.utc)},
+        {
+            "detail": exceptions.ErrorDetail("Invalid", code="invalid"),
+            1: Decimal("1.5"),
+        },
+        exceptions.ValidationError({"title": ["Required"]}).detail,
+        ReturnList([{"title": "Event"}], serializer=None),
+    ],
+)
+def test_renders_as_stdlib(data):
+    rendered = tiko_renderers.ORJSONRenderer().render(data)
+
+    assert rendered == renderers.JSONRenderer().render(data)
+
+
+def test_indent():
+    rendered = tiko_renderers.ORJSONRenderer().render(
+        {"id": 1}, "application/json; indent=4"
+    )
+
+    assert rendered == b'{\n  "id": 1\n}'
+
+
+def test_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(tiko_renderers, "orjson", None)
+    monkeypatch.setattr(tiko_parsers, "orjson", None)
+
+    assert tiko_renderers.ORJSONRenderer().render({"id": 1}) == b'{"id":1}'
+    with pytest.raises(exceptions.ParseError):
+        tiko_parsers.ORJSONParser().parse(io.BytesIO(b"{"))
+
+
+def test_parse():
+    parser = tiko_parsers.ORJSONParser()
+
+    assert parser.parse(io.BytesIO('{"title": "Café"}'.encode())) == {"title": "Café"}
+    with pytest.raises(exceptions.ParseError):
+        parser.parse(io.BytesIO(b'{"capacity": NaN}'))
+
+
+@pytest.mark.django_db
+def test_api_roundtrip(authenticated_client, user):
+    start_time = timezone.now() + timedelta(hours=1)
+    response = authenticated_client.post(
+        "/v1/events/",
+        {
+            "title": "Event",
+            "description": "Description",
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(hours=1)).isoformat(),
+            "capacity": 5,
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+
+    response = authenticated_client.post(
+        "/v1/events/", b"{", content_type="application/json"
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("JSON parse error")
+
+
+@pytest.mark.django_db
+def test_async_list_rendered(authenticated_client):
+    event = factories.EventFactory(start_time=timezone.now() + timedelta(hours=1))
+
+    response = authenticated_client.get("/v1/async/events/")
+
+    assert response["Content-Type"] == "application/json"
+    assert response.json()["results"][0]["id"] == str(event.pk)
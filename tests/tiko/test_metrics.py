@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from tests import const, factories
+
+pytestmark = pytest.mark.django_db
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_list_latency_and_phases(authenticated_client):
+    factories.EventFactory(start_time=timezone.now() + timedelta(hours=2))
+    labels = {"view": "event-list", "action": "list"}
+    before = {
+        phase: sample(
+            "tiko_request_phase_duration_seconds_count", phase=phase, **labels
+        )
+        for phase in ("authentication", "db", "serialization", "rendering")
+    }
+    requests = sample("tiko_request_duration_seconds_count", method="GET", **labels)
+
+    response = authenticated_client.get("/v1/events/")
+    assert response.status_code == 200
+
+    assert sample("tiko_request_duration_seconds_count", method="GET", **labels) == (
+        requests + 1
+    )
+    for phase, count in before.items():
+        assert (
+            sample("tiko_request_phase_duration_seconds_count", phase=phase, **labels)
+            == count + 1
+        ), phase
+    assert sample("tiko_response_size_bytes_sum", **labels) >= len(response.content)
+    assert sample("tiko_responses_total", status="200", **labels) >= 1
+
+
+def test_token_obtain_pair_action(api_client, user):
+    labels = {"view": "token_obtain_pair", "action": "token_obtain_pair"}
+    before = sample("tiko_request_duration_seconds_count", method="POST", **labels)
+
+    api_client.post(
+        "/v1/profile/token/",
+        {"username": user.username, "password": const.DEFAULT_PASSWORD},
+    )
+
+    assert sample("tiko_request_duration_seconds_count", method="POST", **labels) == (
+        before + 1
+    )
+
+
+def test_error_codes(authenticated_client, user):
+    past_event = factories.EventFactory(
+        start_time=timezone.now() - timedelta(hours=2),
+        end_time=timezone.now() - timedelta(hours=1),
+    )
+    full_event = factories.EventFactory(
+        capacity=1,
+        start_time=timezone.now() + timedelta(hours=2),
+        end_time=timezone.now() + timedelta(hours=3),
+    )
+    full_event.attendees.add(factories.UserFactory())
+    labels = {"view": "event-attend", "action": "attend"}
+    read_only = sample("tiko_api_errors_total", code="read_only_event", **labels)
+    exhausted = sample("tiko_api_errors_total", code="capacity_exhausted", **labels)
+
+    response = authenticated_client.post(f"/v1/events/{past_event.pk}/attend/")
+    assert response.status_code == 400
+    response = authenticated_client.post(f"/v1/events/{full_event.pk}/attend/")
+    assert response.status_code == 202
+
+    assert sample("tiko_api_errors_total", code="read_only_event", **labels) == (
+        read_only + 1
+    )
+    assert sample("tiko_api_errors_total", code="capacity_exhausted", **labels) == (
+        exhausted + 1
+    )
+
+
+def test_exposition(api_client, settings):
+    response = api_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert b"tiko_request_duration_seconds" in response.content
+
+
+def test_exposition_token(api_client, settings):
+    settings.METRICS = {**settings.METRICS, "TOKEN": "secret"}
+
+    assert api_client.get("/metrics").status_code == 403
+    response = api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+    assert response.status_code == 200
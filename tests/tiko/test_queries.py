@@ -0,0 +1,139 @@
+import logging
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from events import serializers as events_serializers
+from events import views as event_views
+from tests import factories
+from tiko import queries
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def event(user):
+    return factories.EventFactory(
+        creator=user,
+        capacity=50,
+        start_time=timezone.now() + timedelta(hours=2),
+        end_time=timezone.now() + timedelta(hours=4),
+    )
+
+
+def test_list_queries_do_not_grow_with_events(authenticated_client, user):
+    for event in factories.EventFactory.create_batch(
+        20, start_time=timezone.now() + timedelta(hours=2)
+    ):
+        event.attendees.add(*factories.UserFactory.create_batch(2), user)
+
+    response = authenticated_client.get("/v1/events/")
+
+    assert len(response.json()["results"]) == 20
+    assert len(response.wsgi_request.query_log) == 2
+    assert response.wsgi_request.query_log.time > 0
+
+
+def test_write_actions_within_budget(authenticated_client, event):
+    url = f"/v1/events/{event.pk}/"
+    event.attendees.add(*factories.UserFactory.create_batch(3))
+
+    response = authenticated_client.put(
+        url,
+        {
+            "title": event.title,
+            "description": event.description,
+            "start_time": event.start_time.isoformat(),
+            "end_time": event.end_time.isoformat(),
+            "capacity": 4,
+        },
+    )
+    assert response.status_code == 200
+    response = authenticated_client.delete(url)
+    assert response.status_code == 204
+
+
+def test_over_budget_raises(authenticated_client, event, monkeypatch):
+    monkeypatch.setitem(event_views.EventViewSet.query_budget, "retrieve", 0)
+
+    with pytest.raises(queries.QueryBudgetExceeded, match="GET event-detail ran 1"):
+        authenticated_client.get(f"/v1/events/{event.pk}/")
+
+
+def test_expansion_is_budgeted_separately(authenticated_client, event, monkeypatch):
+    monkeypatch.setitem(event_views.EventViewSet.query_budget, "retrieve", 1)
+    url = f"/v1/events/{event.pk}/"
+
+    response = authenticated_client.get(url, {"expand": "attendees"})
+
+    assert len(response.wsgi_request.query_log) == 2
+    assert response.wsgi_request.extra_query_budget == 1
+    assert not hasattr(authenticated_client.get(url).wsgi_request, "extra_query_budget")
+
+
+def test_waitlist_is_budgeted_separately(authenticated_client, event):
+    event.capacity = 1
+    event.save()
+    events_serializers.EventSerializer().attend(event, factories.UserFactory())
+    url = f"/v1/events/{event.pk}/"
+
+    response = authenticated_client.post(f"{url}attend/")
+    assert response.status_code == 202
+    assert response.wsgi_request.extra_query_budget == 3
+
+    response = authenticated_client.put(
+        url,
+        {
+            "title": event.title,
+            "description": event.description,
+            "start_time": event.start_time.isoformat(),
+            "end_time": event.end_time.isoformat(),
+            "capacity": 2,
+        },
+    )
+    assert response.status_code == 200
+    assert response.wsgi_request.extra_query_budget == 4
+    assert event.attendees.count() == 2
+
+
+def test_repeated_query_raises(authenticated_client, event, settings):
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "MAX_REPEATS": 0}
+
+    with pytest.raises(queries.QueryBudgetExceeded, match="ran 1 times: SELECT"):
+        authenticated_client.get(f"/v1/events/{event.pk}/")
+
+
+def test_unbounded_action_is_not_checked(authenticated_client, user, settings):
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "MAX_REPEATS": 0}
+    events = factories.EventFactory.create_batch(
+        3, start_time=timezone.now() + timedelta(hours=2)
+    )
+
+    response = authenticated_client.post(
+        "/v1/events/bulk-attend/", {"events": [event.pk for event in events]}
+    )
+
+    assert response.status_code == 200
+
+
+def test_logs_endpoint_when_not_raising(
+    authenticated_client, event, monkeypatch, settings, caplog
+):
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "RAISE": False}
+    monkeypatch.setitem(event_views.EventViewSet.query_budget, "retrieve", 0)
+
+    with caplog.at_level(logging.WARNING, logger="tiko.queries"):
+        response = authenticated_client.get(f"/v1/events/{event.pk}/")
+
+    assert response.status_code == 200
+    assert caplog.records[0].endpoint == "event-detail"
+    assert "ran 1 queries, budget is 0" in caplog.records[0].getMessage()
+
+
+def test_disabled(authenticated_client, event, settings):
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "ENABLED": False}
+
+    response = authenticated_client.get(f"/v1/events/{event.pk}/")
+
+    assert not hasattr(response.wsgi_request, "query_log")
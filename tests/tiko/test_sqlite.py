@@ -0,0 +1,62 @@
+import pytest
+from django.db import OperationalError, connection
+
+from tiko.db.sqlite3.base import DatabaseWrapper
+
+
+@pytest.fixture()
+def make_connection(tmp_path, django_db_blocker):
+    wrappers = []
+
+    def make(**options):
+        settings_dict = {
+            **connection.settings_dict,
+            "NAME": str(tmp_path / "db.sqlite3"),
+            "OPTIONS": options,
+        }
+        wrapper = DatabaseWrapper(settings_dict)
+        wrappers.append(wrapper)
+        return wrapper
+
+    with django_db_blocker.unblock():
+        yield make
+
+    for wrapper in wrappers:
+        wrapper.close()
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_pragmas(make_connection):
+    wrapper = make_connection()
+
+    assert pragma(wrapper, "journal_mode") == "wal"
+    assert pragma(wrapper, "synchronous") == 1  # NORMAL
+    assert pragma(wrapper, "cache_size") == -64000
+    assert pragma(wrapper, "busy_timeout") == 20000
+
+
+def test_pragmas_override(make_connection):
+    wrapper = make_connection(pragmas={"synchronous": "FULL"}, timeout=1)
+
+    assert pragma(wrapper, "synchronous") == 2
+    assert pragma(wrapper, "busy_timeout") == 1000
+
+
+def test_transactions_take_write_lock(make_connection):
+    first, second = make_connection(), make_connection(timeout=0.1)
+    first.ensure_connection()
+    second.ensure_connection()
+
+    first.set_autocommit(True)
+    first._start_transaction_under_autocommit()
+    try:
+        # nothing is written yet, but the lock is already held
+        with pytest.raises(OperationalError, match="locked"):
+            second._start_transaction_under_autocommit()
+    finally:
+        first.connection.rollback()
@@ -0,0 +1,86 @@
+"""
+Publish/subscribe of messages between request handlers, used to push updates
+to streaming clients. ``BROKER`` setting names the broker class.
+
+``InMemoryBroker`` fans messages out to subscribers within the process only,
+a multi-process deployment needs a broker backed by a shared pub/sub service
+for pushes to reach clients connected to other workers.
+"""
+
+import asyncio
+import functools
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    Messages of a channel for a single subscriber on an event loop. Messages
+    are snapshots of state, so only the latest undelivered one is kept
+    """
+
+    def __init__(self, broker, channel: str):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=1)
+
+    def put(self, message):
+        """
+        Thread-safe, called by the broker from any thread
+        """
+        self.loop.call_soon_threadsafe(self.replace, message)
+
+    def replace(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel: str) -> Subscription:
+        """
+        Has to be called from the event loop the messages are consumed on
+        """
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.channel, None)
+
+    def has_subscribers(self, channel: str) -> bool:
+        return channel in self.subscriptions
+
+    def publish(self, channel: str, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put(message)
+            except RuntimeError:
+                # event loop of the subscriber is closed
+                self.unsubscribe(subscription)
+
+
+@functools.cache
+def get_broker():
+    return import_string(settings.BROKER)()
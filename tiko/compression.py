@@ -0,0 +1,148 @@
+"""
+Response compression negotiated on ``Accept-Encoding``: Brotli when the client
+accepts it and the ``brotli`` package is installed, gzip otherwise. Bodies
+shorter than ``COMPRESSION["MIN_SIZE"]`` are sent as they are, compressing them
+costs more than it saves. Streamed responses (exports) are compressed chunk by
+chunk.
+"""
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# responses compressed by the middleware, anything else is left alone
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.oai.openapi",
+    "text/",
+)
+# Server-Sent Events, every pushed event has to reach the client as it is
+INCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """
+    Codings of ``Accept-Encoding`` header with their quality values
+    """
+    encodings = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        encodings[coding] = quality
+    return encodings
+
+
+def negotiate(header: str) -> str | None:
+    """
+    Preferred coding supported by both sides, None for identity
+    """
+    encodings = accepted_encodings(header)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best = max(
+        supported, key=lambda coding: encodings.get(coding, encodings.get("*", 0))
+    )
+    if encodings.get(best, encodings.get("*", 0)) <= 0:
+        return None
+    return best
+
+
+def brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        # flushed, so every chunk reaches the client right away
+        yield compressor.process(item) + compressor.flush()
+    yield compressor.finish()
+
+
+async def abrotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    async for item in sequence:
+        yield compressor.process(item) + compressor.flush()
+    yield compressor.finish()
+
+
+async def agzip_sequence(sequence, max_random_bytes):
+    # gzip members, one per chunk, as GZipMiddleware does for async streams
+    async for item in sequence:
+        yield compress_string(item, max_random_bytes=max_random_bytes)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    ``GZipMiddleware`` with Brotli and a configurable size threshold
+    """
+
+    # random gzip header padding against BREACH, as in GZipMiddleware
+    max_random_bytes = 100
+    # dynamic content: high Brotli qualities cost far more CPU than they save
+    brotli_quality = 4
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not response.streaming and len(response.content) < (
+            settings.COMPRESSION["MIN_SIZE"]
+        ):
+            return response
+
+        coding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(response, coding)
+            del response.headers["Content-Length"]
+        else:
+            compressed = self.compress(response.content, coding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # compressed representation differs byte by byte, see RFC 9110 8.8.1
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = coding
+        return response
+
+    @staticmethod
+    def compressible(response) -> bool:
+        content_type = response.get("Content-Type", "")
+        if content_type.startswith(INCOMPRESSIBLE_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def compress(self, content: bytes, coding: str) -> bytes:
+        if coding == "br":
+            return brotli.compress(content, quality=self.brotli_quality)
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def compress_stream(self, response, coding):
+        if response.is_async:
+            if coding == "br":
+                return abrotli_sequence(response.streaming_content, self.brotli_quality)
+            return agzip_sequence(response.streaming_content, self.max_random_bytes)
+        if coding == "br":
+            return brotli_sequence(response.streaming_content, self.brotli_quality)
+        return compress_sequence(
+            response.streaming_content, max_random_bytes=self.max_random_bytes
+        )
@@ -0,0 +1,257 @@
+"""
+Prometheus metrics of API requests, exposed at ``/metrics``.
+
+``MetricsMiddleware`` measures every request: latency per view and action,
+time spent in authentication, database queries, serialization and rendering,
+response size and API error codes (``read_only_event``, ``capacity_exhausted``
+when a user lands on the waitlist, ...). Phases may overlap, e.g. queries run
+while serializing count to both.
+
+Pre-forked workers (gunicorn) write to memory-mapped files in
+``PROMETHEUS_MULTIPROC_DIR``, which every worker aggregates when scraped.
+Without the variable metrics are kept in memory of the single process.
+Gauges are summed over the live workers.
+"""
+
+import contextlib
+import contextvars
+import hmac
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework import exceptions, serializers
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+PHASES = ("authentication", "db", "serialization", "rendering")
+
+REQUEST_LATENCY = Histogram(
+    "tiko_request_duration_seconds",
+    "Request latency",
+    ["view", "action", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+PHASE_LATENCY = Histogram(
+    "tiko_request_phase_duration_seconds",
+    "Time spent in a phase of request handling",
+    ["view", "action", "phase"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "tiko_response_size_bytes",
+    "Size of response bodies, streamed ones excluded",
+    ["view", "action"],
+    buckets=SIZE_BUCKETS,
+)
+RESPONSES = Counter(
+    "tiko_responses", "Responses by status code", ["view", "action", "status"]
+)
+API_ERRORS = Counter(
+    "tiko_api_errors", "API errors by code", ["view", "action", "code"]
+)
+# updated by profiles.hashing.HashingExecutor
+HASHING_IN_FLIGHT = Gauge(
+    "tiko_password_hashing_in_flight",
+    "Password hashing operations running or waiting for a worker",
+    multiprocess_mode="livesum",
+)
+HASHING_QUEUE_DEPTH = Gauge(
+    "tiko_password_hashing_queue_depth",
+    "Password hashing operations waiting for a worker",
+    multiprocess_mode="livesum",
+)
+
+
+class RequestMetrics:
+    def __init__(self, request):
+        self.request = request
+        self.start = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.errors = []
+        self.rendering_start = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # database execute wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.phases["db"] += time.perf_counter() - start
+
+    def labels(self) -> tuple[str, str]:
+        """
+        View name and action, view name again for views which aren't viewsets
+        """
+        match = getattr(self.request, "resolver_match", None)
+        if match is None:
+            return "unmatched", "unmatched"
+        actions = getattr(match.func, "actions", None) or {}
+        return match.view_name, actions.get(
+            self.request.method.lower(), match.view_name
+        )
+
+    def record(self, response):
+        duration = time.perf_counter() - self.start
+        view, action = self.labels()
+
+        REQUEST_LATENCY.labels(view, action, self.request.method).observe(duration)
+        for phase, spent in self.phases.items():
+            if spent:
+                PHASE_LATENCY.labels(view, action, phase).observe(spent)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view, action).observe(len(response.content))
+        RESPONSES.labels(view, action, response.status_code).inc()
+        for code in self.errors:
+            API_ERRORS.labels(view, action, code).inc()
+
+
+current = contextvars.ContextVar("request_metrics", default=None)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """
+    Adds time spent in the block to the phase of the current request
+    """
+    metrics = current.get()
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases[name] += time.perf_counter() - start
+
+
+def record_error(code: str):
+    metrics = current.get()
+    if metrics is not None:
+        metrics.errors.append(code)
+
+
+def exception_handler(exc, context):
+    """
+    DRF exception handler counting error codes of handled exceptions
+    """
+    # imported here, rest_framework.views imports authentication classes
+    # which time themselves with this module
+    from rest_framework import views
+
+    response = views.exception_handler(exc, context)
+    if response is not None and isinstance(exc, exceptions.APIException):
+        for code in flatten(exc.get_codes()):
+            record_error(code)
+    return response
+
+
+def flatten(codes):
+    if isinstance(codes, str):
+        yield codes
+        return
+    for code in codes.values() if isinstance(codes, dict) else codes:
+        yield from flatten(code)
+
+
+class SerializationTimerMixin:
+    """
+    Counts building of serializer ``data`` to the serialization phase
+    """
+
+    @property
+    def data(self):
+        with phase("serialization"):
+            return super().data
+
+
+class TimedListSerializer(SerializationTimerMixin, serializers.ListSerializer):
+    pass
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.METRICS["ENABLED"]
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(request)
+        token = current.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        metrics.record(response)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        # queries of async views run in other threads and aren't timed
+        metrics = RequestMetrics(request)
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        metrics.record(response)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook
+        metrics = current.get()
+        if metrics is not None:
+            metrics.rendering_start = time.perf_counter()
+            response.add_post_render_callback(self.rendered(metrics))
+        return response
+
+    @staticmethod
+    def rendered(metrics):
+        def callback(response):
+            metrics.phases["rendering"] += time.perf_counter() - metrics.rendering_start
+
+        return callback
+
+
+def metrics_view(request):
+    """
+    Prometheus exposition, protected with ``METRICS_TOKEN`` bearer token if set
+    """
+    expected = settings.METRICS["TOKEN"]
+    if expected:
+        provided = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(provided, expected):
+            return HttpResponseForbidden()
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,25 @@
+"""
+JSON parser backed by orjson, falls back to DRF's stdlib one when orjson
+isn't installed
+"""
+
+from django.conf import settings
+from rest_framework import exceptions, parsers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONParser(parsers.JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+
+        # orjson rejects NaN and Infinity, as STRICT_JSON does
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
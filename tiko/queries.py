@@ -0,0 +1,140 @@
+"""
+Query budgets of API endpoints.
+
+Views declare the most queries a request may run with ``query_budget``, either
+a number or a mapping of viewset actions to numbers. ``None`` turns the checks
+off for actions which query per item by design. Optional work requested by
+the client, like expansion of related data, is added to the budget of the
+request with ``allow_more``. ``QueryBudgetMiddleware``
+records queries of every request and reports requests which run more queries
+than their view allows or repeat the same query (N+1). Tests raise
+``QueryBudgetExceeded``, production logs a warning naming the endpoint.
+
+Configured with ``QUERY_BUDGET`` setting:
+    ENABLED     - record queries at all
+    RAISE       - raise instead of logging
+    MAX_REPEATS - how many times a query can run in one request
+"""
+
+import logging
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# views without query_budget are only checked for repeated queries
+UNDECLARED = object()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryLog:
+    """
+    Execute wrapper collecting SQL and time of every query run through it
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.time += duration
+            self.queries.append((sql, duration))
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, max_repeats: int) -> dict[str, int]:
+        """
+        Queries (with placeholders instead of parameters) run more than
+        ``max_repeats`` times
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > max_repeats}
+
+
+def get_budget(request):
+    """
+    Budget of the view handling the request, ``UNDECLARED`` if it has none
+    """
+    match = request.resolver_match
+    view_class = getattr(match.func, "cls", getattr(match.func, "view_class", None))
+    budget = getattr(view_class, "query_budget", UNDECLARED)
+    if isinstance(budget, dict):
+        # viewsets map HTTP methods to actions
+        actions = getattr(match.func, "actions", None) or {}
+        return budget.get(actions.get(request.method.lower()), UNDECLARED)
+    return budget
+
+
+def allow_more(request, queries: int):
+    """
+    Raises the budget of the request by ``queries``
+    """
+    # DRF requests wrap the one seen by the middleware
+    request = getattr(request, "_request", request)
+    request.extra_query_budget = getattr(request, "extra_query_budget", 0) + queries
+
+
+def check(request, log: QueryLog, config: dict):
+    if getattr(request, "resolver_match", None) is None:
+        return
+    budget = get_budget(request)
+    if budget is None:
+        return
+    if budget is not UNDECLARED:
+        budget += getattr(request, "extra_query_budget", 0)
+
+    problems = []
+    if budget is not UNDECLARED and len(log) > budget:
+        problems.append(f"ran {len(log)} queries, budget is {budget}")
+    for sql, count in log.repeated(config["MAX_REPEATS"]).items():
+        problems.append(f"ran {count} times: {sql}")
+    if not problems:
+        return
+
+    endpoint = request.resolver_match.view_name
+    message = f"{request.method} {endpoint} " + "; ".join(problems)
+    if config["RAISE"]:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message, extra={"endpoint": endpoint, "queries": len(log)})
+
+
+class QueryBudgetMiddleware:
+    """
+    Recorded queries of the request are available as ``request.query_log``.
+    Async views run their queries in other threads, they are passed through
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+
+        config = settings.QUERY_BUDGET
+        if not config["ENABLED"]:
+            return self.get_response(request)
+
+        request.query_log = QueryLog()
+        with connection.execute_wrapper(request.query_log):
+            response = self.get_response(request)
+        check(request, request.query_log, config)
+        return response
@@ -0,0 +1,38 @@
+"""
+JSON renderer backed by orjson, falls back to DRF's stdlib one when orjson
+isn't installed. UUIDs and datetimes are encoded natively, anything else
+orjson doesn't know goes through DRF's ``JSONEncoder``.
+"""
+
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    def __init__(self):
+        self.encoder = self.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        # same output as stdlib json: "Z" for UTC, keys converted to strings.
+        # Subclasses of builtins go through default(), orjson would serialize
+        # e.g. Django's ErrorList (a list keeping items elsewhere) as empty
+        option = (
+            orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS
+        )
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=self.default, option=option)
+
+    def default(self, obj):
+        if isinstance(obj, str):
+            return str(obj)
+        return self.encoder.default(obj)
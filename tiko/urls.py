@@ -24,10 +24,14 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from tiko import metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("v1/", include("events.urls")),
     path("v1/profile/", include("profiles.urls")),
+    path("v1/async/", include("events.async_urls")),
+    path("metrics", metrics.metrics_view, name="metrics"),
     # generated schema
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     # UI for schema